@@ -0,0 +1,197 @@
+import os
+import time
+import json
+import math
+import uuid
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from cache import response_cache
+from batch_analysis import compact_metrics, format_verdict
+
+ANALYSIS_TTL = int(os.getenv("ANALYSIS_TTL", "1800"))
+JOB_RETENTION = 3600
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+
+
+class AnalysisError(Exception):
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+# Métriques réécrites par le rafraîchissement : comparées par ordre de grandeur (puissance de 2)
+# pour qu'une analyse pré-calculée reste valable tant que le token n'a pas nettement bougé
+VOLATILE_FIELDS = ("market_cap", "holders", "volume", "bonding_percent")
+
+
+def _bucket(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return value
+    return round(math.log2(value)) if value > 0 else 0
+
+
+def metrics_hash(metrics):
+    stable = {key: _bucket(value) if key in VOLATILE_FIELDS else value for key, value in metrics.items()}
+    return hashlib.sha256(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def market_hash(metrics):
+    # Empreinte des seules métriques de marché : calculable depuis le suivi, sans appel réseau
+    return metrics_hash({key: metrics.get(key) for key in VOLATILE_FIELDS})
+
+
+def _valid(analysis):
+    return not analysis["analysis"].startswith("Error calling GPT")
+
+
+class AnalysisService:
+    def __init__(self, store, gather, build_prompt, ask, notify=None, batch=None, peek=None):
+        # gather(adresse) -> dict de métriques (peut lever AnalysisError)
+        # peek(adresse) -> métriques de marché connues sans appel réseau, ou None
+        # batch : BatchAnalyzer optionnel, utilisé pour le pré-calcul groupé
+        self.store = store
+        self.gather = gather
+        self.build_prompt = build_prompt
+        self.ask = ask
+        self.notify = notify
+        self.batch = batch
+        self.peek = peek
+        self.jobs = {}
+        self.inflight = {}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+    def recent_analysis(self, token_address):
+        # Lecture sans appel réseau : analyse encore valable pour ce token et son marché actuel
+        metrics = self.peek(token_address) if self.peek else None
+        if metrics is None:
+            return None
+        saved = self.store.get("analyses", token_address)
+        if (saved and saved.get("market_hash") == market_hash(metrics)
+                and time.time() - saved.get("timestamp", 0) < ANALYSIS_TTL):
+            return saved
+        return None
+
+    def submit(self, token_address):
+        analysis = self.recent_analysis(token_address)
+        with self._lock:
+            self._expire_jobs()
+            # Single-flight : un seul job en cours par token, les autres appelants le rejoignent
+            job_id = self.inflight.get(token_address)
+            if job_id is not None:
+                return self.jobs[job_id]
+            job = {"id": uuid.uuid4().hex, "token": token_address, "status": "pending", "created_at": time.time()}
+            self.jobs[job["id"]] = job
+            if analysis is not None:
+                # Cache chaud : réponse immédiate, postée dans le chat seulement si elle ne l'a jamais été
+                job.update({"status": "done", "prompt": analysis["prompt"], "analysis": analysis["analysis"],
+                            "cached": True, "finished_at": time.time()})
+            else:
+                self.inflight[token_address] = job["id"]
+        if analysis is not None:
+            self._executor.submit(self._announce, token_address, analysis)
+            return job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _expire_jobs(self):
+        limit = time.time() - JOB_RETENTION
+        for job_id in [job_id for job_id, job in self.jobs.items() if job["status"] != "pending" and job["created_at"] < limit]:
+            del self.jobs[job_id]
+
+    def cached_analysis(self, metrics):
+        digest = metrics_hash(metrics)
+        found, analysis = response_cache.get("analysis", digest)
+        if found:
+            return digest, analysis
+        saved = self.store.get("analyses", metrics.get("token_address"))
+        if saved and saved.get("metrics_hash") == digest and time.time() - saved.get("timestamp", 0) < ANALYSIS_TTL:
+            response_cache.set("analysis", digest, saved, ANALYSIS_TTL)
+            return digest, saved
+        return digest, None
+
+    def analyze(self, token_address):
+        metrics = self.gather(token_address)
+        digest, analysis = self.cached_analysis(metrics)
+        if analysis is not None:
+            return analysis, False
+        prompt = self.build_prompt(metrics)
+        analysis = self._save(token_address, metrics, digest, {"prompt": prompt, "analysis": self.ask(prompt)})
+        return analysis, True
+
+    def _save(self, token_address, metrics, digest, result):
+        analysis = {"symbol": metrics.get("symbol"), **result, "metrics_hash": digest,
+                    "market_hash": market_hash(metrics), "timestamp": time.time()}
+        if _valid(analysis):
+            response_cache.set("analysis", digest, analysis, ANALYSIS_TTL)
+            self.store.upsert("analyses", token_address, analysis)
+        return analysis
+
+    def _announce(self, token_address, analysis):
+        # Une analyse est postée une seule fois : à sa production, ou au premier clic si elle a été pré-calculée
+        if self.notify is None:
+            return
+        with self._lock:
+            # Le store fait foi : la copie en cache mémoire ne voit pas la marque posée par un autre clic
+            saved = self.store.get("analyses", token_address) or {}
+            if analysis.get("posted_at") or (saved.get("posted_at") and saved.get("metrics_hash") == analysis["metrics_hash"]):
+                return
+            analysis["posted_at"] = time.time()
+            if _valid(analysis):
+                self.store.upsert("analyses", token_address, analysis)
+        self.notify(token_address, analysis)
+
+    def _gather_or_none(self, token_address):
+        try:
+            return self.gather(token_address)
+        except Exception as e:
+            logging.warning("⚠️ Métriques indisponibles pour %s: %s", token_address, e)
+            return None
+
+    def analyze_many(self, token_addresses):
+        # Pré-calcul : les tokens sans analyse en cache partent ensemble dans une requête GPT groupée
+        if self.batch is None:
+            for token_address in token_addresses:
+                self.analyze(token_address)
+            return
+        submitted = {}
+        for token_address, metrics in zip(token_addresses, self._executor.map(self._gather_or_none, token_addresses)):
+            if metrics is None:
+                continue
+            digest, analysis = self.cached_analysis(metrics)
+            if analysis is None:
+                submitted[token_address] = (metrics, digest, self.batch.submit(token_address, metrics))
+        for token_address, (metrics, digest, future) in submitted.items():
+            verdict = future.result()
+            if verdict is None:
+                continue
+            self._save(token_address, metrics, digest, {
+                "prompt": json.dumps(compact_metrics(token_address, metrics), ensure_ascii=False, default=str),
+                "analysis": format_verdict(verdict),
+                "verdict": verdict,
+                "mode": "batch",
+            })
+
+    def _run(self, job):
+        try:
+            analysis, fresh = self.analyze(job["token"])
+            self._announce(job["token"], analysis)
+            result = {"status": "done", "prompt": analysis["prompt"], "analysis": analysis["analysis"], "cached": not fresh}
+        except AnalysisError as e:
+            result = {"status": "error", "error": str(e), "code": e.status}
+        except Exception as e:
+            logging.error("❌ Analysis error for %s: %s", job['token'], e)
+            result = {"status": "error", "error": str(e), "code": 500}
+        with self._lock:
+            job.update(result)
+            job["finished_at"] = time.time()
+            self.inflight.pop(job["token"], None)
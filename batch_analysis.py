@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import Future
+from threading import Condition, Lock, Thread
+
+from rate_limit import TokenBucket
+
+MODEL = os.getenv("ANALYSIS_MODEL", "gpt-3.5-turbo")
+# Budget d'entrée par requête (tokens estimés) et plafond de tokens analysés ensemble
+BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", "3000"))
+BATCH_MAX_ITEMS = int(os.getenv("ANALYSIS_BATCH_MAX_ITEMS", "10"))
+OUTPUT_TOKENS_PER_ITEM = 180
+# Fenêtre d'attente pour regrouper les demandes arrivées presque en même temps
+BATCH_WINDOW = float(os.getenv("ANALYSIS_BATCH_WINDOW", "2"))
+REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "20"))
+
+SYSTEM_PROMPT = (
+    "Tu es un expert en trading crypto spécialisé dans les tokens ultra-récents sur Pump.fun (Solana), "
+    "avec l'approche de TendersAlt : probabilités, setups Fibonacci, observation des wallets, sans émotions. "
+    "Pour chaque token fourni, réponds uniquement en JSON : "
+    '{"verdicts": [{"token": <adresse>, "setup": <intérêt du setup, 1 phrase>, "entry_mc": <market cap d\'entrée ou null>, '
+    '"stop_loss": <stop loss>, "allocation_pct": <% du portefeuille>, "exit_signal": <signal de sortie>, '
+    '"manipulation": <signal de manipulation / fake pump ou null>}]}. '
+    "Sois direct, concis, stratégique."
+)
+
+METRIC_FIELDS = ("name", "symbol", "market_cap", "volume", "bonding_percent", "holders", "rugscore",
+                 "lp_status", "smart_wallets", "top5_distribution", "scamr_note")
+
+
+def estimate_tokens(text):
+    # Approximation suffisante pour respecter un budget (~4 caractères par token)
+    return len(text) // 4 + 1
+
+
+def compact_metrics(token_address, metrics):
+    return {"token": token_address, **{field: metrics.get(field) for field in METRIC_FIELDS}}
+
+
+def pack(items, budget=BATCH_TOKEN_BUDGET, max_items=BATCH_MAX_ITEMS):
+    # items : [(adresse, métriques)] -> lots respectant le budget d'entrée
+    base = estimate_tokens(SYSTEM_PROMPT)
+    batches, current, used = [], [], base
+    for token_address, metrics in items:
+        cost = estimate_tokens(json.dumps(compact_metrics(token_address, metrics), ensure_ascii=False, default=str))
+        if current and (used + cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], base
+        current.append((token_address, metrics))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_verdict(verdict):
+    return "\n".join([
+        f"1. **Setup** : {verdict.get('setup') or 'N/A'}",
+        f"2. **Entrée** : {verdict.get('entry_mc') or 'pas d’entrée'}",
+        f"3. **Stop loss** : {verdict.get('stop_loss') or 'N/A'}",
+        f"4. **Allocation** : {verdict.get('allocation_pct') or 'N/A'}",
+        f"5. **Sortie** : {verdict.get('exit_signal') or 'N/A'}",
+        f"6. **Manipulation** : {verdict.get('manipulation') or 'aucun signal'}",
+    ])
+
+
+class OpenAILimiter:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE):
+        # Débit partagé par les analyses unitaires et groupées : chaque appelant attend son tour
+        self.bucket = TokenBucket(requests_per_minute / 60, capacity=1)
+        self.waiting = 0
+        self._lock = Lock()
+        self._counter = Lock()
+
+    def acquire(self):
+        with self._counter:
+            self.waiting += 1
+        try:
+            with self._lock:
+                wait = self.bucket.wait_time()
+                if wait > 0:
+                    time.sleep(wait)
+                self.bucket.consume()
+        finally:
+            with self._counter:
+                self.waiting -= 1
+
+
+class BatchAnalyzer:
+    def __init__(self, client, model=MODEL, limiter=None):
+        self.client = client
+        self.model = model
+        self.limiter = limiter or OpenAILimiter()
+        self.requests = 0
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        self._pending = []
+        self._condition = Condition()
+        self._thread = None
+
+    def submit(self, token_address, metrics):
+        # Future résolue avec le verdict (dict) ou None si le modèle a omis ce token
+        future = Future()
+        with self._condition:
+            self._pending.append((token_address, metrics, future))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="gpt-batch", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            # Laisse arriver les demandes voisines, puis respecte le débit autorisé vers OpenAI
+            time.sleep(BATCH_WINDOW)
+            self.limiter.acquire()
+            with self._condition:
+                pending = self._pending
+                futures = {}
+                for token_address, _, future in pending:
+                    futures.setdefault(token_address, []).append(future)
+                unique = {token_address: metrics for token_address, metrics, _ in pending}
+                batch = pack(list(unique.items()))[0]
+                batched = {token_address for token_address, _ in batch}
+                self._pending = [entry for entry in pending if entry[0] not in batched]
+            try:
+                verdicts = self.analyze_batch(batch)
+            except Exception as e:
+                logging.error("❌ Batch GPT error (%d tokens): %s", len(batch), e)
+                for token_address, _ in batch:
+                    for future in futures[token_address]:
+                        future.set_exception(e)
+                continue
+            for token_address, _ in batch:
+                for future in futures[token_address]:
+                    future.set_result(verdicts.get(token_address))
+
+    def analyze_batch(self, batch):
+        payload = {"tokens": [compact_metrics(token_address, metrics) for token_address, metrics in batch]}
+        self.requests += 1
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(payload, ensure_ascii=False, default=str)},
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=OUTPUT_TOKENS_PER_ITEM * len(batch),
+            temperature=0.4,
+        )
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.usage["prompt_tokens"] += usage.prompt_tokens or 0
+            self.usage["completion_tokens"] += usage.completion_tokens or 0
+        return parse_verdicts(response.choices[0].message.content, [token_address for token_address, _ in batch])
+
+
+def parse_verdicts(content, token_addresses):
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        logging.error("❌ Réponse GPT batch non JSON: %.200s", content)
+        return {}
+    entries = data.get("verdicts", []) if isinstance(data, dict) else data
+    expected = set(token_addresses)
+    verdicts = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and entry.get("token") in expected:
+            verdicts[entry["token"]] = entry
+    missing = expected - set(verdicts)
+    if missing:
+        logging.warning("⚠️ Verdict GPT manquant pour %d token(s)", len(missing))
+    return verdicts
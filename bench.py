@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import statistics
+
+import http_client
+from replay import StubServer, synthesize, DEFAULT_FIXTURES
+
+
+def _io_counters():
+    # Octets lus/écrits par le process (Linux) ; à défaut, 0
+    counters = {}
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                key, value = line.split(":")
+                counters[key] = int(value)
+    except OSError:
+        pass
+    return counters
+
+
+def _io_delta(before, after):
+    return {key: after.get(key, 0) - before.get(key, 0) for key in ("rchar", "wchar", "read_bytes", "write_bytes")}
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _summary(name, durations, items, io_per_cycle):
+    total = sum(durations)
+    return {
+        "bench": name,
+        "cycles": len(durations),
+        "items_per_cycle": items,
+        "tokens_per_second": round(items * len(durations) / total, 1) if total else None,
+        "p50_ms": round(1000 * statistics.median(durations), 1) if durations else None,
+        "p99_ms": round(1000 * _percentile(durations, 99), 1),
+        "io_per_cycle": {key: int(statistics.mean(values)) for key, values in io_per_cycle.items()} if io_per_cycle else {},
+    }
+
+
+def _collect_io(io_per_cycle, delta):
+    for key, value in delta.items():
+        io_per_cycle.setdefault(key, []).append(value)
+
+
+def bench_scanner(main, cycles):
+    durations = []
+    io_per_cycle = {}
+    items = 0
+    for _ in range(cycles):
+        # Chaque cycle repart d'un état vierge pour mesurer le pipeline complet
+        main.response_cache.clear()
+        main.store.delete_many("seen", [key for key, _ in main.store.items("seen")])
+        main.store.delete_many("tracking", [key for key, _ in main.store.items("tracking")])
+        before = _io_counters()
+        started = time.perf_counter()
+        result = main.check_tokens()
+        durations.append(time.perf_counter() - started)
+        _collect_io(io_per_cycle, _io_delta(before, _io_counters()))
+        items = result.get("scanned", 0)
+    return _summary("scanner", durations, items, io_per_cycle)
+
+
+def bench_analyze(main, cycles):
+    client = main.app.test_client()
+    tokens = [key for key, _ in main.store.items("tracking")] or ["unknown"]
+    durations = []
+    io_per_cycle = {}
+    for i in range(cycles):
+        main.response_cache.clear()
+        before = _io_counters()
+        started = time.perf_counter()
+        job = client.get(f"/analyze?token={tokens[i % len(tokens)]}").get_json()
+        while job.get("status") == "pending":
+            time.sleep(0.005)
+            job = client.get(job["poll"]).get_json()
+        durations.append(time.perf_counter() - started)
+        _collect_io(io_per_cycle, _io_delta(before, _io_counters()))
+    return _summary("analyze", durations, 1, io_per_cycle)
+
+
+def bench_bonding(store, cycles):
+    from bonding_tracker import bonding_poller
+    poller = bonding_poller(store=store)
+    durations = []
+    io_per_cycle = {}
+    for _ in range(cycles):
+        before = _io_counters()
+        started = time.perf_counter()
+        poller.poll()
+        durations.append(time.perf_counter() - started)
+        _collect_io(io_per_cycle, _io_delta(before, _io_counters()))
+    return _summary("bonding_tracker", durations, len(poller.known), io_per_cycle)
+
+
+def use_stub(stub):
+    # http_client a déjà lu HTTP_UPSTREAM_OVERRIDE à l'import de replay : la surcharge est posée en direct
+    os.environ["HTTP_UPSTREAM_OVERRIDE"] = stub.url
+    os.environ["OPENAI_BASE_URL"] = f"{stub.url}/v1"
+    http_client.set_upstream_override(stub.url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne du pipeline de scan")
+    parser.add_argument("--fixtures", default=None, help=f"Capture à rejouer (ex. {DEFAULT_FIXTURES}) ; synthétique sinon")
+    parser.add_argument("--tokens", type=int, default=100, help="Taille du lot synthétique")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--only", choices=["scanner", "analyze", "bonding"], action="append")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pumpfun-bench-")
+    fixtures = os.path.abspath(args.fixtures) if args.fixtures else os.path.join(workdir, "upstream.jsonl")
+    if not args.fixtures:
+        synthesize(fixtures, args.tokens)
+    stub = StubServer(fixtures, args.latency_ms, args.jitter_ms, args.error_rate).start()
+
+    # L'état du bot (SQLite, journaux) vit dans un répertoire temporaire
+    os.chdir(workdir)
+    os.environ["STATE_DB"] = os.path.join(workdir, "bench_state.db")
+    use_stub(stub)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as bot
+
+    benches = args.only or ["scanner", "analyze", "bonding"]
+    results = []
+    if "scanner" in benches:
+        results.append(bench_scanner(bot, args.cycles))
+    if "analyze" in benches:
+        results.append(bench_analyze(bot, args.cycles))
+    if "bonding" in benches:
+        results.append(bench_bonding(bot.store, args.cycles))
+    results.append({"stub_requests": stub.requests, "workdir": workdir})
+    print(json.dumps(results, indent=2))
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
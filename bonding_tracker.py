@@ -1,31 +1,52 @@
-
-import requests
-import json
+import os
 import time
-from datetime import datetime
+import logging
+
+from event_log import EventLog, EVENT_ENTER, EVENT_EXIT
+from moralis_feed import FeedPoller, FeedScheduler
+from storage import get_store
 
-API_URL = "https://solana-gateway.moralis.io/token/mainnet/exchange/pumpfun/bonding"
 HEADERS = {
     "accept": "application/json",
-    "X-API-Key": "YOUR_API_KEY_HERE"
+    "X-API-Key": os.getenv("MORALIS_API", "YOUR_API_KEY_HERE")
 }
-OUTPUT_FILE = "token_bonded_list.json"
+EVENT_LOG_FILE = "bonding_events.log"
+
+class BondingTracker:
+    def __init__(self, event_log, on_events=None):
+        self.event_log = event_log
+        self.on_events = on_events
+        # adresse -> first_seen, reconstruit depuis le journal au démarrage
+        self.known = {}
+        events, _ = event_log.read_from(0)
+        for event_type, _, first_seen, address in events:
+            if event_type == EVENT_ENTER:
+                self.known[address] = first_seen
+            else:
+                self.known.pop(address, None)
+
+    def record(self, new_tokens, tokens):
+        now = time.time()
+        current = {t["tokenAddress"] for t in tokens if t.get("tokenAddress")}
+        events = []
+        for address in current - self.known.keys():
+            self.known[address] = now
+            events.append((EVENT_ENTER, now, now, address))
+        for address in self.known.keys() - current:
+            events.append((EVENT_EXIT, now, self.known.pop(address), address))
+        self.event_log.append(events)
+        logging.info("⛓ Bonding tokens tracked: %d (+%d / -%d)", len(self.known),
+                     sum(e[0] == EVENT_ENTER for e in events), sum(e[0] == EVENT_EXIT for e in events))
+        if events and self.on_events:
+            self.on_events()
 
-def fetch_bonding_tokens():
-    try:
-        response = requests.get(API_URL, headers=HEADERS, params={"limit": 100})
-        if response.status_code == 200:
-            tokens = response.json().get("result", [])
-            graduated = {t["tokenAddress"]: datetime.utcnow().isoformat() for t in tokens}
-            with open(OUTPUT_FILE, "w") as f:
-                json.dump(graduated, f)
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] ⛓ Graduated tokens tracked: {len(graduated)}")
-        else:
-            print("❌ Failed to fetch bonding tokens")
-    except Exception as e:
-        print("Erreur bonding_tracker:", e)
+def bonding_poller(headers=HEADERS, store=None, on_events=None):
+    tracker = BondingTracker(EventLog(EVENT_LOG_FILE), on_events)
+    return FeedPoller(
+        "bonding", "bonding", headers, tracker.record, store or get_store(),
+        min_interval=20, base_interval=60, max_interval=180,
+    )
 
 if __name__ == "__main__":
-    while True:
-        fetch_bonding_tokens()
-        time.sleep(60)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    FeedScheduler([bonding_poller()]).run_forever()
@@ -0,0 +1,96 @@
+import os
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+
+# TTL (secondes) des réponses valides, par source
+SOURCE_TTL = {
+    "rugcheck": int(os.getenv("CACHE_TTL_RUGCHECK", "300")),
+    "bonding": int(os.getenv("CACHE_TTL_BONDING", "60")),
+    "top_holders": int(os.getenv("CACHE_TTL_TOP_HOLDERS", "300")),
+    "scamr": int(os.getenv("CACHE_TTL_SCAMR", "600")),
+    "analysis": int(os.getenv("ANALYSIS_TTL", "1800")),
+}
+DEFAULT_TTL = 120
+# TTL court pour les erreurs : on évite de marteler un upstream en panne sans figer l'échec
+NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", "30"))
+
+
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, source, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get((source, key))
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end((source, key))
+                self.hits[source] = self.hits.get(source, 0) + 1
+                return True, entry[1]
+            if entry is not None:
+                del self._data[(source, key)]
+            self.misses[source] = self.misses.get(source, 0) + 1
+            return False, None
+
+    def set(self, source, key, value, ttl):
+        with self._lock:
+            self._data[(source, key)] = (time.monotonic() + ttl, value)
+            self._data.move_to_end((source, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, source, key):
+        with self._lock:
+            self._data.pop((source, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            sources = set(self.hits) | set(self.misses)
+            stats = {"size": len(self._data)}
+            for source in sorted(sources):
+                hits = self.hits.get(source, 0)
+                misses = self.misses.get(source, 0)
+                stats[source] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                }
+            return stats
+
+
+response_cache = ResponseCache()
+
+
+def _reset_after_fork():
+    response_cache._lock = Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def cached(source, is_error=lambda value: value is None):
+    def decorator(fetcher):
+        @wraps(fetcher)
+        def wrapper(key):
+            found, value = response_cache.get(source, key)
+            if found:
+                return value
+            value = fetcher(key)
+            ttl = NEGATIVE_TTL if is_error(value) else SOURCE_TTL.get(source, DEFAULT_TTL)
+            response_cache.set(source, key, value, ttl)
+            return value
+        wrapper.uncached = fetcher
+        return wrapper
+    return decorator
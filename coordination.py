@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import socket
+import logging
+from threading import Event, Lock, Thread
+
+LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "30"))
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    acquired_at REAL NOT NULL
+);
+"""
+
+
+def instance_id():
+    return os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLease:
+    def __init__(self, store, name="scanner", holder=None, ttl=LEASE_TTL, on_lost=None):
+        # Bail en base : un seul détenteur tant que expires_at n'est pas dépassé, renouvelé par un thread
+        self.store = store
+        self.name = name
+        self.holder = holder or instance_id()
+        self.ttl = ttl
+        self.on_lost = on_lost
+        self.held = False
+        self._acquired = Event()
+        self._lock = Lock()
+        self._thread = None
+        store.ensure_schema(LEASE_SCHEMA)
+
+    def try_acquire(self):
+        now = time.time()
+        with self.store.transaction() as tx:
+            tx.execute(
+                "INSERT INTO leases (name, holder, expires_at, acquired_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at, "
+                "acquired_at = CASE WHEN leases.holder = excluded.holder THEN leases.acquired_at ELSE excluded.acquired_at END "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (self.name, self.holder, now + self.ttl, now, now),
+            )
+            row = tx.execute("SELECT holder FROM leases WHERE name = ?", (self.name,)).fetchone()
+        return row is not None and row[0] == self.holder
+
+    def release(self):
+        with self.store.transaction() as tx:
+            tx.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+        self.held = False
+
+    def current(self):
+        rows = self.store.query("SELECT holder, expires_at, acquired_at FROM leases WHERE name = ?", (self.name,))
+        if not rows or rows[0][1] < time.time():
+            return None
+        holder, expires_at, acquired_at = rows[0]
+        return {"holder": holder, "expires_at": expires_at, "acquired_at": acquired_at}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=f"lease-{self.name}", daemon=True)
+                self._thread.start()
+
+    def wait_until_leader(self, timeout=None):
+        self.start()
+        return self._acquired.wait(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                acquired = self.try_acquire()
+            except Exception as e:
+                logging.error("❌ Lease %s error: %s", self.name, e)
+                acquired = False
+            if acquired and not self.held:
+                logging.info("👑 %s devient leader '%s'", self.holder, self.name)
+                self.held = True
+                self._acquired.set()
+            elif self.held and not acquired:
+                logging.critical("⚠️ %s a perdu le bail '%s'", self.holder, self.name)
+                self.held = False
+                self._acquired.clear()
+                if self.on_lost:
+                    self.on_lost()
+            # Renouvellement au tiers du TTL ; un candidat non leader réessaie au même rythme
+            time.sleep(self.ttl / 3)
+
+
+def _contend(db_path, name, ttl, run_for):
+    from storage import Store
+    lease = LeaderLease(Store(db_path), name=name, ttl=ttl)
+    print(f"{lease.holder} candidat", flush=True)
+    lease.wait_until_leader()
+    print(f"{lease.holder} LEADER", flush=True)
+    time.sleep(run_for)
+    print(f"{lease.holder} quitte sans libérer le bail", flush=True)
+
+
+if __name__ == "__main__":
+    # python coordination.py status | contend [instances] : plusieurs processus locaux se disputent le bail
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    from storage import DB_FILE, get_store
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "status":
+        print(LeaderLease(get_store()).current())
+    elif command == "contend":
+        from multiprocessing import Process
+        instances = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        ttl = float(os.getenv("LEADER_LEASE_TTL", "3"))
+        processes = [Process(target=_contend, args=(DB_FILE, "contend-demo", ttl, 2 * ttl)) for _ in range(instances)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        print("Usage: python coordination.py [status|contend [instances]]")
@@ -0,0 +1,102 @@
+import os
+import zlib
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from threading import BoundedSemaphore
+
+import http_client
+
+MAX_WORKERS = int(os.getenv("ENRICH_WORKERS", "16"))
+# 0 : enrichissement dans le processus courant ; N : N processus, un shard chacun.
+# Les limites de concurrence (ci-dessous et par host dans http_client) restent des totaux :
+# chaque shard en reçoit 1/N, au moins 1 appel (au-delà de N = limite, le total dépasse la limite)
+ENRICH_PROCESSES = int(os.getenv("ENRICH_PROCESSES", "0"))
+
+# Nombre max d'appels simultanés par upstream (RugCheck rate-limite vite)
+UPSTREAM_LIMITS = {
+    "rugcheck": int(os.getenv("RUGCHECK_CONCURRENCY", "6")),
+    "bonding": int(os.getenv("BONDING_CONCURRENCY", "4")),
+    "scamr": int(os.getenv("SCAMR_CONCURRENCY", "4")),
+}
+
+_executor = None
+_semaphores = {}
+_shards = []
+
+
+def _reset():
+    # Appelé au chargement et dans chaque processus forké : les threads et verrous du parent n'y survivent pas
+    global _executor, _semaphores, _shards
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="enrich")
+    _semaphores = {source: BoundedSemaphore(limit) for source, limit in UPSTREAM_LIMITS.items()}
+    _shards = []
+
+
+_reset()
+os.register_at_fork(after_in_child=_reset)
+
+
+def _init_shard(shards):
+    global _semaphores
+    _semaphores = {source: BoundedSemaphore(max(1, limit // shards)) for source, limit in UPSTREAM_LIMITS.items()}
+    http_client.divide_concurrency(shards)
+
+
+def _call_limited(source, fetcher, token_address):
+    semaphore = _semaphores.get(source)
+    if semaphore is None:
+        return fetcher(token_address)
+    with semaphore:
+        return fetcher(token_address)
+
+
+def enrich(token_addresses, fetchers, defaults=None):
+    defaults = defaults or {}
+    futures = {}
+    for token_address in token_addresses:
+        for source, fetcher in fetchers.items():
+            futures[(token_address, source)] = _executor.submit(_call_limited, source, fetcher, token_address)
+
+    results = {}
+    for (token_address, source), future in futures.items():
+        try:
+            value = future.result()
+        except Exception as e:
+            logging.error("❌ Enrichment error (%s) for %s: %s", source, token_address, e)
+            value = defaults.get(source)
+        results.setdefault(token_address, {})[source] = value
+    return results
+
+
+def shard_of(token_address, shards):
+    # Hash stable entre processus (hash() est randomisé par interpréteur)
+    return zlib.crc32(token_address.encode("utf-8")) % shards
+
+
+def _shard_pool(index):
+    while len(_shards) < ENRICH_PROCESSES:
+        _shards.append(ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork"),
+                                           initializer=_init_shard, initargs=(ENRICH_PROCESSES,)))
+    return _shards[index]
+
+
+def enrich_sharded(token_addresses, fetchers, defaults=None):
+    # Chaque token est toujours traité par le même processus : son cache upstream y reste chaud
+    if ENRICH_PROCESSES <= 0:
+        return enrich(token_addresses, fetchers, defaults)
+    by_shard = {}
+    for token_address in token_addresses:
+        by_shard.setdefault(shard_of(token_address, ENRICH_PROCESSES), []).append(token_address)
+    futures = {
+        index: _shard_pool(index).submit(enrich, addresses, fetchers, defaults)
+        for index, addresses in by_shard.items()
+    }
+    results = {}
+    for index, future in futures.items():
+        try:
+            results.update(future.result())
+        except Exception as e:
+            logging.error("❌ Enrichment shard %d error: %s", index, e)
+            results.update(enrich(by_shard[index], fetchers, defaults))
+    return results
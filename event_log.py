@@ -0,0 +1,52 @@
+import os
+import mmap
+import struct
+from threading import Lock
+
+EVENT_ENTER = 1
+EVENT_EXIT = 2
+EVENT_NAMES = {EVENT_ENTER: "enter", EVENT_EXIT: "exit"}
+
+# type (u8), padding, timestamp (f64), first_seen (f64), adresse base58 (44 octets)
+RECORD = struct.Struct("<B3xdd44s")
+
+
+class EventLog:
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+
+    def append(self, events):
+        if not events:
+            return self.size()
+        data = b"".join(
+            RECORD.pack(event_type, ts, first_seen, address.encode("ascii"))
+            for event_type, ts, first_seen, address in events
+        )
+        with self._lock, open(self.path, "ab") as f:
+            # Un enregistrement tronqué par un crash est retiré : sinon tous les suivants seraient décalés
+            valid = self.size()
+            if f.tell() != valid:
+                f.truncate(valid)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def size(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        # Un enregistrement incomplet (crash en pleine écriture) est ignoré
+        return size - size % RECORD.size
+
+    def read_from(self, offset=0):
+        end = self.size()
+        if offset >= end:
+            return [], offset
+        events = []
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for event_type, ts, first_seen, address in RECORD.iter_unpack(mm[offset:end]):
+                events.append((event_type, ts, first_seen, address.rstrip(b"\0").decode("ascii")))
+        return events, end
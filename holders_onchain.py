@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+from threading import Lock
+
+import http_client
+
+TOP_N = 5
+MAX_BATCH = 100
+MAX_ACCOUNTS_PER_CALL = 100
+# Un résultat reste valable tant que la chaîne n'a pas avancé de plus de N slots (~400 ms/slot)
+SLOT_TOLERANCE = int(os.getenv("HOLDERS_SLOT_TOLERANCE", "150"))
+SLOT_REFRESH = 2
+COUNT_HOLDERS = os.getenv("HOLDERS_COUNT_VIA_GPA", "0") == "1"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+
+
+class RpcError(Exception):
+    pass
+
+
+class HolderAnalyzer:
+    def __init__(self, rpc_url, top_n=TOP_N, count_holders=COUNT_HOLDERS):
+        self.rpc_url = rpc_url
+        self.top_n = top_n
+        self.count_holders = count_holders
+        self.round_trips = 0
+        self._cache = {}
+        self._slot = (0, 0.0)
+        self._lock = Lock()
+
+    def _batch(self, calls):
+        # Un seul aller-retour HTTP par lot JSON-RPC (découpé à MAX_BATCH appels)
+        results = {}
+        for i in range(0, len(calls), MAX_BATCH):
+            chunk = calls[i:i + MAX_BATCH]
+            payload = [
+                {"jsonrpc": "2.0", "id": i + j, "method": method, "params": params}
+                for j, (method, params) in enumerate(chunk)
+            ]
+            self.round_trips += 1
+            response = http_client.post(self.rpc_url, json=payload)
+            if response.status_code != 200:
+                raise RpcError(f"HTTP {response.status_code}")
+            for item in response.json():
+                if "error" in item:
+                    logging.warning("⚠️ RPC %s: %s", payload[item["id"] - i]["method"], item["error"])
+                    continue
+                results[item["id"]] = item.get("result")
+        return [results.get(i) for i in range(len(calls))]
+
+    def current_slot(self):
+        with self._lock:
+            slot, fetched_at = self._slot
+        if time.monotonic() - fetched_at < SLOT_REFRESH:
+            return slot
+        (slot,) = self._batch([("getSlot", [{"commitment": "confirmed"}])])
+        with self._lock:
+            self._slot = (slot or 0, time.monotonic())
+        return slot or 0
+
+    def analyze(self, mints):
+        if not self.rpc_url:
+            raise RpcError("no Solana RPC URL configured")
+        slot = self.current_slot()
+        fresh = {}
+        with self._lock:
+            for mint in mints:
+                cached = self._cache.get(mint)
+                if cached is None:
+                    continue
+                if slot - cached[0] <= SLOT_TOLERANCE:
+                    fresh[mint] = cached[1]
+                else:
+                    del self._cache[mint]
+        missing = [mint for mint in dict.fromkeys(mints) if mint not in fresh]
+        if missing:
+            fresh.update(self._fetch(missing))
+        return {mint: fresh.get(mint) for mint in mints}
+
+    def _evict(self, slot):
+        # Appelé sous self._lock, une fois par lot récupéré : retire les résultats périmés jamais redemandés
+        stale = [mint for mint, (cached_slot, _) in self._cache.items() if slot - cached_slot > SLOT_TOLERANCE]
+        for mint in stale:
+            del self._cache[mint]
+
+    def _fetch(self, mints):
+        calls = []
+        for mint in mints:
+            calls.append(("getTokenSupply", [mint, {"commitment": "confirmed"}]))
+            calls.append(("getTokenLargestAccounts", [mint, {"commitment": "confirmed"}]))
+            if self.count_holders:
+                calls.append(("getProgramAccounts", [TOKEN_PROGRAM_ID, {
+                    "commitment": "confirmed",
+                    "encoding": "base64",
+                    "dataSlice": {"offset": 0, "length": 0},
+                    "filters": [{"dataSize": 165}, {"memcmp": {"offset": 0, "bytes": mint}}],
+                }]))
+        per_mint = 3 if self.count_holders else 2
+        results = self._batch(calls)
+
+        largest = {}
+        supplies = {}
+        counts = {}
+        slots = {}
+        for index, mint in enumerate(mints):
+            supply, accounts = results[index * per_mint], results[index * per_mint + 1]
+            if not supply or not accounts:
+                continue
+            supplies[mint] = float(supply["value"].get("uiAmount") or 0)
+            largest[mint] = accounts["value"]
+            slots[mint] = accounts.get("context", {}).get("slot", 0)
+            if self.count_holders:
+                holders = results[index * per_mint + 2]
+                counts[mint] = len(holders) if holders is not None else None
+
+        # Propriétaires des plus gros comptes : getMultipleAccounts groupés dans un seul lot
+        addresses = list(dict.fromkeys(account["address"] for accounts in largest.values() for account in accounts))
+        owners = {}
+        account_calls = [
+            ("getMultipleAccounts", [addresses[i:i + MAX_ACCOUNTS_PER_CALL], {"encoding": "jsonParsed", "commitment": "confirmed"}])
+            for i in range(0, len(addresses), MAX_ACCOUNTS_PER_CALL)
+        ]
+        for call, result in zip(account_calls, self._batch(account_calls) if account_calls else []):
+            for address, account in zip(call[1][0], (result or {}).get("value") or []):
+                try:
+                    owners[address] = account["data"]["parsed"]["info"]["owner"]
+                except (TypeError, KeyError):
+                    owners[address] = address
+
+        analyzed = {}
+        for mint, accounts in largest.items():
+            supply = supplies[mint]
+            by_owner = {}
+            for account in accounts:
+                owner = owners.get(account["address"], account["address"])
+                by_owner[owner] = by_owner.get(owner, 0) + float(account.get("uiAmount") or 0)
+            shares = sorted(by_owner.values(), reverse=True)[:self.top_n]
+            top_holders = [round(100 * amount / supply, 1) if supply else 0 for amount in shares]
+            analyzed[mint] = {
+                "top_holders": top_holders,
+                "top_share": round(sum(top_holders), 1),
+                "holder_count": counts.get(mint),
+                "slot": slots[mint],
+            }
+        with self._lock:
+            for mint, result in analyzed.items():
+                self._cache[mint] = (result["slot"], result)
+            self._evict(max(slots.values(), default=0))
+        return analyzed
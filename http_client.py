@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import random
+import logging
+import requests
+from threading import BoundedSemaphore, Lock
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+from metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
+
+# Réglages par host : timeout (s), appels simultanés max, nombre de retries
+DEFAULT_CONFIG = {"timeout": 10, "max_concurrency": 10, "retries": 2}
+HOST_CONFIG = {
+    "solana-gateway.moralis.io": {"timeout": 20, "max_concurrency": 4, "retries": 2},
+    "api.rugcheck.xyz": {"timeout": 8, "max_concurrency": 6, "retries": 2},
+    "api.callstaticrpc.com": {"timeout": 10, "max_concurrency": 4, "retries": 2},
+    "mainnet.helius-rpc.com": {"timeout": 10, "max_concurrency": 4, "retries": 2},
+    "ai.scamr.xyz": {"timeout": 10, "max_concurrency": 4, "retries": 1},
+    "api.telegram.org": {"timeout": 10, "max_concurrency": 8, "retries": 0},
+    "tendy-api.onrender.com": {"timeout": 10, "max_concurrency": 2, "retries": 0},
+}
+# Surcharge possible via HTTP_HOST_CONFIG='{"api.rugcheck.xyz": {"timeout": 5}}'
+for _host, _overrides in json.loads(os.getenv("HTTP_HOST_CONFIG", "{}")).items():
+    HOST_CONFIG[_host] = {**HOST_CONFIG.get(_host, DEFAULT_CONFIG), **_overrides}
+
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = int(os.getenv("HTTP_BREAKER_COOLDOWN", "60"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Rejeu hors-ligne : toutes les requêtes partent vers le stub local (voir replay.py)
+UPSTREAM_OVERRIDE = os.getenv("HTTP_UPSTREAM_OVERRIDE")
+_recorder = None
+
+
+def set_upstream_override(base_url):
+    global UPSTREAM_OVERRIDE
+    UPSTREAM_OVERRIDE = base_url
+
+
+def set_recorder(recorder):
+    # recorder(method, url, params, response) est appelé après chaque réponse reçue
+    global _recorder
+    _recorder = recorder
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    # Backoff exponentiel avec "full jitter"
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Semi-ouvert : une requête d'essai après le cooldown
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+
+class _Host:
+    def __init__(self, host):
+        self.config = HOST_CONFIG.get(host, DEFAULT_CONFIG)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config["max_concurrency"])
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.semaphore = BoundedSemaphore(self.config["max_concurrency"])
+        self.breaker = CircuitBreaker()
+
+
+_hosts = {}
+_hosts_lock = Lock()
+
+
+def _reset_after_fork():
+    # Sessions et sockets du parent non partagées avec un processus forké
+    global _hosts, _hosts_lock
+    _hosts = {}
+    _hosts_lock = Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def divide_concurrency(parts):
+    # Processus d'un pool de N : chacun reçoit 1/N des appels simultanés autorisés par host (au moins 1)
+    global DEFAULT_CONFIG
+    DEFAULT_CONFIG = {**DEFAULT_CONFIG, "max_concurrency": max(1, DEFAULT_CONFIG["max_concurrency"] // parts)}
+    for host, config in HOST_CONFIG.items():
+        HOST_CONFIG[host] = {**config, "max_concurrency": max(1, config["max_concurrency"] // parts)}
+    _reset_after_fork()
+
+
+def _host_for(url):
+    host = urlsplit(url).hostname or ""
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = _Host(host)
+        return host, _hosts[host]
+
+
+def _target(url, host, kwargs):
+    if not UPSTREAM_OVERRIDE:
+        return url
+    parts = urlsplit(url)
+    kwargs["headers"] = {**(kwargs.get("headers") or {}), "X-Upstream-Host": host}
+    return f"{UPSTREAM_OVERRIDE.rstrip('/')}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def request(method, url, retries=None, **kwargs):
+    host, state = _host_for(url)
+    kwargs.setdefault("timeout", state.config["timeout"])
+    target = _target(url, host, kwargs)
+    retries = state.config["retries"] if retries is None else retries
+    attempt = 0
+    while True:
+        if not state.breaker.allow():
+            UPSTREAM_ERRORS.inc(host=host, kind="circuit_open")
+            raise CircuitOpenError(f"circuit ouvert pour {host}")
+        started = time.perf_counter()
+        try:
+            with state.semaphore:
+                response = state.session.request(method, target, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, host=host, status="error")
+            UPSTREAM_ERRORS.inc(host=host, kind="timeout" if isinstance(e, requests.Timeout) else "connection")
+            state.breaker.record_failure()
+            if attempt >= retries:
+                raise
+            logging.warning("⚠️ %s injoignable (%s), retry %d/%d", host, e, attempt + 1, retries)
+        else:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, host=host, status=response.status_code)
+            if _recorder is not None:
+                _recorder(method, url, kwargs.get("params"), response)
+            if response.status_code >= 500:
+                state.breaker.record_failure()
+            else:
+                state.breaker.record_success()
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            logging.warning("⚠️ %s a répondu %s, retry %d/%d", host, response.status_code, attempt + 1, retries)
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def breaker_states():
+    with _hosts_lock:
+        return {host: state.breaker.state for host, state in _hosts.items()}
@@ -0,0 +1,162 @@
+import time
+import logging
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = end = int(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    # Format cron classique : minute heure jour_du_mois mois jour_de_semaine (0 = lundi)
+    def __init__(self, expression):
+        minute, hour, day, month, weekday = expression.split()
+        self.expression = expression
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = _parse_field(day, 1, 31)
+        self.months = _parse_field(month, 1, 12)
+        self.weekdays = _parse_field(weekday, 0, 6)
+
+    def next_after(self, timestamp):
+        t = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366)
+        while t < limit:
+            if t.month not in self.months or t.day not in self.days or t.weekday() not in self.weekdays:
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+                continue
+            if t.minute in self.minutes:
+                return t.timestamp()
+            t += timedelta(minutes=1)
+        raise ValueError(f"Aucune occurrence pour '{self.expression}'")
+
+
+class IntervalSchedule:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def next_after(self, timestamp):
+        return timestamp + self.seconds
+
+
+class Job:
+    def __init__(self, name, func, schedule=None, dynamic=False):
+        # dynamic : la fonction renvoie elle-même le délai avant la prochaine exécution
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.dynamic = dynamic
+        self.next_run = time.time() if dynamic else schedule.next_after(time.time())
+        self.running = False
+        self.wake_pending = False
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+        self.skipped = 0
+
+
+class JobScheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._lock = Lock()
+        self._wakeup = Event()
+
+    def add(self, name, func, schedule=None, dynamic=False):
+        with self._lock:
+            self.jobs[name] = Job(name, func, schedule, dynamic)
+        self._wakeup.set()
+
+    def wake(self, name):
+        with self._lock:
+            job = self.jobs.get(name)
+            if job is None:
+                return
+            if job.running:
+                job.wake_pending = True
+            else:
+                job.next_run = time.time()
+        self._wakeup.set()
+
+    def status(self):
+        with self._lock:
+            return {
+                name: {
+                    "running": job.running,
+                    "next_run": job.next_run,
+                    "last_run": job.last_run,
+                    "last_duration": job.last_duration,
+                    "last_error": job.last_error,
+                    "skipped": job.skipped,
+                }
+                for name, job in self.jobs.items()
+            }
+
+    def _execute(self, job):
+        started = time.time()
+        delay = None
+        try:
+            delay = job.func()
+            job.last_error = None
+        except Exception as e:
+            logging.error("❌ Job %s error: %s", job.name, e)
+            job.last_error = str(e)
+        with self._lock:
+            job.running = False
+            job.last_run = started
+            job.last_duration = time.time() - started
+            if job.dynamic:
+                delay = 0 if job.wake_pending else (delay if delay is not None else 60)
+                job.next_run = time.time() + delay
+            job.wake_pending = False
+        self._wakeup.set()
+
+    def run_pending(self):
+        now = time.time()
+        to_start = []
+        with self._lock:
+            for job in self.jobs.values():
+                if job.next_run > now:
+                    continue
+                if job.running:
+                    # Pas de chevauchement : l'occurrence est sautée
+                    job.skipped += 1
+                    logging.warning("⏭️ Job %s encore en cours, occurrence sautée", job.name)
+                else:
+                    job.running = True
+                    to_start.append(job)
+                if job.dynamic:
+                    # Prochaine échéance fixée à la fin du run
+                    job.next_run = float("inf")
+                else:
+                    # Correction de dérive : on avance sur le calendrier, pas depuis la fin du run
+                    next_run = job.schedule.next_after(job.next_run)
+                    while next_run <= now:
+                        next_run = job.schedule.next_after(next_run)
+                    job.next_run = next_run
+        for job in to_start:
+            Thread(target=self._execute, args=(job,), name=f"job-{job.name}", daemon=True).start()
+
+    def run_forever(self):
+        while True:
+            self.run_pending()
+            with self._lock:
+                next_run = min((job.next_run for job in self.jobs.values()), default=time.time() + 60)
+            self._wakeup.wait(timeout=max(0.05, min(60, next_run - time.time())))
+            self._wakeup.clear()
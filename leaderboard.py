@@ -0,0 +1,48 @@
+import heapq
+from threading import Lock
+
+COMPACT_RATIO = 4
+
+
+class WinnersIndex:
+    # Tas max (multiplicateur négatif) avec suppression paresseuse des entrées périmées
+    def __init__(self):
+        self._heap = []
+        self._current = {}
+        self._lock = Lock()
+
+    def update(self, token_address, symbol, initial, current):
+        multiplier = current / initial if initial and current else 0
+        with self._lock:
+            if multiplier <= 1:
+                self._current.pop(token_address, None)
+            elif self._current.get(token_address) != (multiplier, symbol):
+                self._current[token_address] = (multiplier, symbol)
+                heapq.heappush(self._heap, (-multiplier, token_address, symbol))
+            if len(self._heap) > COMPACT_RATIO * max(16, len(self._current)):
+                self._compact()
+
+    def remove(self, token_address):
+        with self._lock:
+            self._current.pop(token_address, None)
+
+    def _compact(self):
+        self._heap = [(-multiplier, token_address, symbol) for token_address, (multiplier, symbol) in self._current.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, k=3):
+        winners = []
+        popped = []
+        emitted = set()
+        with self._lock:
+            while self._heap and len(winners) < k:
+                entry = heapq.heappop(self._heap)
+                neg_multiplier, token_address, symbol = entry
+                if token_address in emitted or self._current.get(token_address) != (-neg_multiplier, symbol):
+                    continue
+                emitted.add(token_address)
+                popped.append(entry)
+                winners.append((symbol, round(-neg_multiplier, 2), token_address))
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+        return winners
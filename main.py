@@ -1,37 +1,52 @@
 import os
+import html
 import time
-import json
-import requests
+import http_client
 from datetime import datetime
 from flask import Flask, request, jsonify
 from threading import Thread
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 import logging
+from enrichment import enrich_sharded
+from seen_index import is_seen, mark_seen, sweep_seen
+from cache import cached, response_cache
+from storage import get_store
+from tendy_sync import sync_to_tendy
+from telegram_outbox import TelegramOutbox
+from moralis_feed import FeedPoller, FeedScheduler
+from bonding_tracker import bonding_poller, EVENT_LOG_FILE
+from event_log import EventLog, EVENT_EXIT
+from rules import RuleEngine, FILTER_RULES
+from refresher import MarkToMarketRefresher, PUMPFUN_SUPPLY
+from jobs import JobScheduler, CronSchedule, IntervalSchedule
+from leaderboard import WinnersIndex
+from analysis import AnalysisService, AnalysisError
+from scan_coordinator import ScanCoordinator
+from metrics import Gauge, render as render_metrics
+from subscriptions import SubscriptionRegistry, DIMENSIONS, format_thresholds
+from holders_onchain import HolderAnalyzer
+from work_queue import WorkQueue, QueueConsumer
+from coordination import LeaderLease
+from batch_analysis import BatchAnalyzer, OpenAILimiter
+from timeseries import TokenHistory
 
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO),
     format='%(asctime)s %(levelname)s %(message)s',
 )
 logging.info("✅ Fichier lancé correctement — import os OK")
 
-def save_for_analysis(token_name):
-    try:
-        with open("tokens_to_analyze.json", "r") as f:
-            tokens = json.load(f)
-    except FileNotFoundError:
-        tokens = []
-
-    if token_name not in tokens:
-        tokens.append(token_name)
-        with open("tokens_to_analyze.json", "w") as f:
-            json.dump(tokens, f)
+if os.getenv("HTTP_RECORD"):
+    from replay import Recorder
+    Recorder(os.getenv("HTTP_RECORD")).start()
 
 app = Flask(__name__)
 
 @app.route("/scan_tokens", methods=["POST"])
 def scan_tokens():
-    Thread(target=check_tokens).start()
-    return jsonify({"status": "scan lancé"})
+    return jsonify({"status": "scan lancé", "scan": request_scan("api")})
 
 ADMIN_USER_ID = os.getenv("ADMIN_USER_ID", "Glacesol")
 
@@ -39,15 +54,15 @@ def load_secret(path, fallback_env=None):
     try:
         with open(path) as f:
             secret = f.read().strip()
-            logging.debug(f"Secret chargé depuis {path}")
+            logging.debug("Secret chargé depuis %s", path)
             return secret
     except Exception as e:
         if fallback_env:
             val = os.getenv(fallback_env)
             if val:
-                logging.debug(f"Secret chargé depuis env {fallback_env}")
+                logging.debug("Secret chargé depuis env %s", fallback_env)
                 return val
-        logging.error(f"❌ Missing secret {path} and no fallback ({fallback_env}) : {e}")
+        logging.error("❌ Missing secret %s and no fallback (%s) : %s", path, fallback_env, e)
         return None
 
 API_KEY = load_secret("/etc/secrets/MORALIS_API", "MORALIS_API")
@@ -56,9 +71,7 @@ CHAT_ID = load_secret("/etc/secrets/CHAT_ID", "CHAT_ID")
 HELIUS_API_KEY = load_secret("/etc/secrets/HELIUS_API", "HELIUS_API_KEY")
 CALLSTATIC_API = load_secret("/etc/secrets/CALLSTATIC_API", "CALLSTATIC_API")
 
-MEMORY_FILE = "token_memory_ultimate.json"
-TRACKING_FILE = "token_tracking.json"
-WALLET_STATS_FILE = "wallet_stats.json"
+SEEN_SWEEP_INTERVAL = 3600
 API_URL = "https://solana-gateway.moralis.io/token/mainnet/exchange/pumpfun/graduated?limit=100"
 
 HEADERS = {
@@ -66,40 +79,51 @@ HEADERS = {
     "X-API-Key": API_KEY,
 }
 
-def send_simple_message(text, chat_id):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "Markdown"
-    }
-    try:
-        requests.post(url, json=payload, timeout=10)
-    except Exception as e:
-        logging.error("❌ Telegram simple message error: %s", e)
+store = get_store()
+store.migrate_all()
 
-def load_json(file):
-    if not os.path.exists(file):
-        return {}
-    try:
-        with open(file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"❌ JSON load error for {file}: {e}")
-        return {}
+# File d'envoi Telegram persistée ; toute instance peut y écrire, seul le leader la vide
+outbox = TelegramOutbox(store, TELEGRAM_TOKEN)
 
-def save_json(data, file):
-    try:
-        with open(file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logging.error(f"❌ JSON save error for {file}: {e}")
+def on_leadership_lost():
+    # Un autre processus a repris le bail : on s'arrête plutôt que de scanner en double
+    logging.critical("❌ Bail scanner perdu, arrêt du processus")
+    os._exit(1)
+
+# Un seul processus scanne, vide l'outbox et rafraîchit les prix, même avec plusieurs instances
+leader_lease = LeaderLease(store, "scanner", on_lost=on_leadership_lost)
 
+# File des tokens alertés à pré-analyser (remplace tokens_to_analyze.json)
+analysis_queue = WorkQueue(store, "analysis")
+analysis_queue.migrate_json("tokens_to_analyze.json")
+
+# Abonnés aux alertes ; le chat historique est abonné une seule fois, un /unsubscribe y reste définitif
+subscriptions = SubscriptionRegistry(store)
+if CHAT_ID and not store.get_meta(f"subscribed:default:{CHAT_ID}"):
+    if not subscriptions.get(CHAT_ID):
+        subscriptions.subscribe(CHAT_ID)
+    store.set_meta(f"subscribed:default:{CHAT_ID}", {"at": time.time()})
+
+def send_simple_message(text, chat_id):
+    outbox.enqueue(chat_id, text)
+
+def sweep_seen_index(now):
+    if now - store.get_meta("seen_sweep_at", 0) < SEEN_SWEEP_INTERVAL:
+        return 0
+    index = dict(store.items("seen"))
+    known = set(index)
+    removed = sweep_seen(index, now)
+    with store.transaction() as tx:
+        store.delete_many("seen", known - set(index), conn=tx)
+        store.set_meta("seen_sweep_at", now, conn=tx)
+    return removed
+
+@cached("scamr")
 def get_scamr_holders(token_address):
     try:
         url = f"https://ai.scamr.xyz/token/{token_address}"
         headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers)
         soup = BeautifulSoup(response.text, "html.parser")
         text = soup.get_text()
         for line in text.splitlines():
@@ -107,13 +131,16 @@ def get_scamr_holders(token_address):
                 return line.strip().split("Score:")[-1].strip()
         return None
     except Exception as e:
-        logging.error(f"❌ Scamr error: {e}")
+        logging.error("❌ Scamr error: %s", e)
         return None
 
+RUGCHECK_EMPTY = (None, None, None, None, None, [], None, None, None)
+
+@cached("rugcheck", is_error=lambda result: result == RUGCHECK_EMPTY)
 def get_rugcheck_data(token_address):
     url = f"https://api.rugcheck.xyz/v1/tokens/{token_address}/report"
     try:
-        resp = requests.get(url, timeout=8)
+        resp = http_client.get(url)
         if resp.status_code == 200:
             data = resp.json()
             score = data.get("score_normalised") or data.get("score")
@@ -145,46 +172,46 @@ def get_rugcheck_data(token_address):
             risk_label = data.get("risk_label") or data.get("riskLevel") or data.get("risk_level")
             return score, honeypot, lp_locked, holders, volume, top_holders, freeze_removed, mint_revoked, risk_label
         else:
-            logging.error(f"RugCheck public error: {resp.status_code} {resp.text}")
-            return None, None, None, None, None, [], None, None, None
+            logging.error("RugCheck public error: %s %s", resp.status_code, resp.text)
+            return RUGCHECK_EMPTY
     except Exception as e:
-        logging.error(f"RugCheck API error: {e}")
-        return None, None, None, None, None, [], None, None, None
+        logging.error("RugCheck API error: %s", e)
+        return RUGCHECK_EMPTY
 
-def get_rugcheck_holders_with_retry(token_address, max_retries=15, delay=2):
+def get_rugcheck_holders_with_retry(token_address, max_retries=8, delay=1):
     for attempt in range(max_retries):
-        _, _, _, holders, *_ = get_rugcheck_data(token_address)
+        _, _, _, holders, *_ = get_rugcheck_data.uncached(token_address)
         if holders and holders > 0:
             return holders
-        time.sleep(delay)
+        time.sleep(http_client.backoff_delay(attempt, base=delay))
     return None
 
+@cached("bonding")
 def get_bonding_curve(token_address):
     try:
         url = f"https://api.callstaticrpc.com/pumpfun/v1/token/{token_address}"
         headers = {"Authorization": f"Bearer {CALLSTATIC_API}"}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers)
         data = response.json()
         percentage = float(data.get("bondingCurve", {}).get("percentageComplete", 0.0)) * 100
         return round(percentage, 2)
     except Exception as e:
-        logging.error(f"❌ Bonding curve error: {e}")
+        logging.error("❌ Bonding curve error: %s", e)
         return None
 
+holder_analyzer = HolderAnalyzer(
+    os.getenv("SOLANA_RPC_URL") or (f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}" if HELIUS_API_KEY else None)
+)
+
+@cached("top_holders", is_error=lambda result: not result)
 def get_top_holders(token_address):
     try:
-        url = f"https://app.bubblemaps.io/api/token/sol/{token_address}"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        holders = data.get("holders", [])[:5]
-        percentages = [round(h.get("share", 0) * 100, 2) for h in holders]
-        return percentages
+        return (holder_analyzer.analyze([token_address])[token_address] or {}).get("top_holders", [])
     except Exception as e:
-        logging.error(f"❌ Top holders error: {e}")
+        logging.error("❌ Top holders error: %s", e)
         return []
 
-def send_telegram_message(message, token_address):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+def send_telegram_message(message, token_address, chat_ids=None):
     keyboard = {
         "inline_keyboard": [[
             {"text": "🤖 Analyze with AI", "url": f"https://pumpfun-bot-1.onrender.com/analyze?token={token_address}"}
@@ -198,179 +225,340 @@ def send_telegram_message(message, token_address):
             {"text": "📊 Axiom (Ref)", "url": f"https://axiom.trade/@glace"}
         ]]
     }
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown",
-        "reply_markup": keyboard
-    }
-    try:
-        requests.post(url, json=payload, timeout=10)
-        time.sleep(2)
-    except Exception as e:
-        logging.error("❌ Telegram error: %s", e)
+    # Message rendu une seule fois, réutilisé pour chaque destinataire
+    for chat_id in chat_ids or [CHAT_ID]:
+        outbox.enqueue(chat_id, message, reply_markup=keyboard)
 
 def search_twitter_mentions(symbol):
     if symbol:
         return f"https://twitter.com/search?q=%24{symbol}&src=typed_query"
     return ""
 
-def send_to_tendy_api(tokens, analyses=None):
-    api_base = "https://tendy-api.onrender.com"
+RUGCHECK_FIELDS = ("rugscore", "honeypot", "lp_locked", "holders", "volume", "top_holders",
+                   "freeze_removed", "mint_revoked", "risk_label")
+
+def fetch_rugcheck_batch(token_addresses):
+    results = enrich_sharded(token_addresses, {"rugcheck": get_rugcheck_data}, defaults={"rugcheck": RUGCHECK_EMPTY})
+    return {
+        token_address: {**dict(zip(RUGCHECK_FIELDS, result["rugcheck"])), "rugcheck_ok": result["rugcheck"] != RUGCHECK_EMPTY}
+        for token_address, result in results.items()
+    }
+
+def fetch_onchain_batch(token_addresses):
+    # Quelques requêtes JSON-RPC groupées pour toute la page, au lieu d'un appel par token
     try:
-        response_tokens = requests.post(f"{api_base}/tokens", json=tokens, timeout=10)
-        logging.info(f"✅ Tokens envoyés à l'API Tendy: {response_tokens.status_code}")
-        if analyses is not None:
-            response_analyses = requests.post(f"{api_base}/analyses_history", json=analyses, timeout=10)
-            logging.info(f"✅ Analyses envoyées à l'API Tendy: {response_analyses.status_code}")
+        results = holder_analyzer.analyze(token_addresses)
     except Exception as e:
-        logging.error(f"❌ Erreur d'envoi à l'API Tendy: {e}")
+        logging.error("❌ On-chain holders error: %s", e)
+        results = {}
+    return {
+        token_address: {"top_holders": (result or {}).get("top_holders", [])}
+        for token_address, result in ((address, results.get(address)) for address in token_addresses)
+    }
 
-def check_tokens():
-    logging.info("🔍 Checking tokens...")
+filter_engine = RuleEngine(FILTER_RULES, {"onchain": fetch_onchain_batch, "rugcheck": fetch_rugcheck_batch})
+
+def get_holders_and_volume(token_address):
+    _, _, _, holders, volume, *_ = get_rugcheck_data(token_address)
+    return holders, volume
+
+winners_index = WinnersIndex()
+for _token_address, _track in store.items("tracking"):
+    winners_index.update(_token_address, _track.get("symbol", "N/A"), _track.get("initial", 0), _track.get("current"))
+
+# Historique colonnes : un point par token à la détection puis à chaque rafraîchissement
+history = TokenHistory()
+
+def detection_snapshot(token, verdict, rule, now):
+    # Point de départ de l'historique pour tout token jugé, rejeté ou alerté (rejouable par le back-test)
+    return {
+        "initial": token["mc"], "current": token["mc"], "lq": token["lq"], "timestamp": now,
+        **{field: token.get(field) for field in ("holders", "volume", "rugscore", "top_holders", "lp_locked", "honeypot")},
+        "verdict": verdict, "rule": rule,
+    }
+
+def on_tracking_refreshed(updates, evicted):
+    history.append(updates)
+    for token_address, track in updates.items():
+        winners_index.update(token_address, track.get("symbol", "N/A"), track.get("initial", 0), track.get("current"))
+    for token_address in evicted:
+        winners_index.remove(token_address)
+
+refresher = MarkToMarketRefresher(store, HEADERS, details_fetcher=get_holders_and_volume, on_update=on_tracking_refreshed)
+
+def format_launch(created_at, now):
+    if not created_at:
+        return ""
     try:
-        response = requests.get(API_URL, headers=HEADERS, timeout=20)
-        data = response.json().get("result", [])
+        if int(created_at) > 1e12:
+            created_at = int(created_at) / 1000
+        seconds = int(now - float(created_at))
+        minutes = seconds // 60
+        hours = minutes // 60
+        if hours > 0:
+            launch_info = f"{hours}h {minutes % 60}min"
+        else:
+            launch_info = f"{minutes}min"
+        return f"⏰ Launch: {launch_info} ago\n"
     except Exception as e:
-        logging.error("❌ Moralis API error: %s", e)
-        time.sleep(300)
-        return
-    memory = load_json(MEMORY_FILE)
-    tracking = load_json(TRACKING_FILE)
-    wallet_stats = load_json(WALLET_STATS_FILE)
-    now = time.time()
-
-    for token in data:
-        token_address = token.get("tokenAddress")
-        if not token_address:
-            continue
-        name = token.get("name", "")
-        symbol = token.get("symbol", "")
-        mc = float(token.get("fullyDilutedValuation") or 0)
-        lq = float(token.get("liquidity") or 0)
-        created_at = token.get("createdAt") or token.get("timestamp") or token.get("launchDate")
-        launch_str = ""
-        if created_at:
+        logging.warning("Erreur calcul launch_str: %s", e)
+        return ""
+
+def build_alert_message(token_address, name, symbol, mc, volume, holders, launch_str, lp_locked, freeze_removed,
+                        mint_revoked, rugscore, risk_label, honeypot, attention, top_holders):
+    msg = "🚨 *New Token Detected!*\n\n"
+    if name: msg += f"💰 *Name:* {name}\n"
+    if symbol: msg += f"🪙 *Symbol:* ${symbol}\n"
+    if mc: msg += f"📈 *Market Cap:* ${int(mc):,}\n"
+    if volume: msg += f"📊 *Volume (1h):* ${int(volume):,}\n"
+    if holders: msg += f"👥 *Holders:* {holders}\n"
+    if launch_str: msg += launch_str
+    msg += "\n"
+    msg += "🛡️ *Security Check (RugCheck)*\n"
+    msg += f"- {'✅' if lp_locked else '❌'} Liquidity Burned\n"
+    msg += f"- {'✅' if freeze_removed else '❌'} Freeze Authority Removed\n"
+    msg += f"- {'✅' if mint_revoked else '❌'} Mint Authority Revoked\n"
+    msg += f"- {'🔒' if lp_locked else '🔓'} LP Locked\n"
+    if rugscore is not None: msg += f"- 🔥 *RugScore:* {rugscore}/100\n"
+    if risk_label: msg += f"- 🏷️ *RugCheck Label:* {risk_label}\n"
+    if honeypot is not None: msg += f"- {'❌' if honeypot else '✅'} Honeypot: {'Yes' if honeypot else 'No'}\n"
+    msg += attention
+    msg += "\n"
+    if top_holders:
+        msg += "📊 *Top Holders:*\n"
+        msg += "\n".join([f"{i+1}. {pct}%" for i, pct in enumerate(top_holders)])
+        msg += "\n"
+    msg += "\n"
+    if symbol:
+        msg += f"🔎 *Check X:* [Recherche X ${symbol}](https://twitter.com/search?q=%24{symbol}&src=typed_query)\n\n"
+    msg += "📍 *Liens Utiles:*\n"
+    msg += f"- 🌐 Pump.fun: pump.fun/{token_address}\n"
+    msg += "\n"
+    if token_address:
+        msg += "🧬 *Adresse du Token:*\n"
+        msg += f"`{token_address}`\n"
+    return msg
+
+def check_tokens(data=None):
+    logging.info("🔍 Checking tokens...")
+    if data is None:
+        with scans.stage("fetch"):
             try:
-                if int(created_at) > 1e12:
-                    created_at = int(created_at) / 1000
-                seconds = int(now - float(created_at))
-                minutes = seconds // 60
-                hours = minutes // 60
-                if hours > 0:
-                    launch_info = f"{hours}h {minutes % 60}min"
-                else:
-                    launch_info = f"{minutes}min"
-                launch_str = f"⏰ Launch: {launch_info} ago\n"
+                response = http_client.get(API_URL, headers=HEADERS)
+                data = response.json().get("result", [])
             except Exception as e:
-                logging.warning(f"Erreur calcul launch_str: {e}")
-
-        rugscore, honeypot, lp_locked, holders, volume, top_holders, freeze_removed, mint_revoked, risk_label = get_rugcheck_data(token_address)
-        logging.info(f"🔎 Token found: {symbol} — MC: {mc} — Holders: {holders}")
-
-        if top_holders and top_holders[0] >= 30:
-            logging.info(f"❌ Top holder >= 30% ({top_holders[0]}%) – skipping token")
-            memory[token_address] = now
-            continue
-
-        if mc < 45000 or lq < 8000 or (holders is not None and holders < 80):
-            logging.info("❌ Filtered out due to MC, liquidity or holders")
-            continue
-        if honeypot:
-            logging.info("⚠️ Honeypot detected, skipping token")
-            memory[token_address] = now
-            continue
-        if not lp_locked:
-            logging.info("❌ LP not locked – token skipped")
-            memory[token_address] = now
-            continue
-
-        attention = ""
-        if rugscore is not None and rugscore < 40:
-            if holders is not None and holders >= 500:
-                logging.info(f"⚠️ Rugscore faible ({rugscore}) mais {holders} holders, token envoyé avec avertissement")
+                logging.error("❌ Moralis API error: %s", e)
+                return {"error": f"Moralis API error: {e}"}
+    now = time.time()
+    with scans.stage("filter"):
+        page_addresses = [token["tokenAddress"] for token in data if token.get("tokenAddress")]
+        memory = store.get_many("seen", page_addresses)
+        tracked = store.get_many("tracking", page_addresses)
+        verdicts = {}
+        new_tracking = {}
+
+        # Index des tokens déjà jugés : aucun appel réseau pour eux
+        candidates = [
+            token for token in data
+            if token.get("tokenAddress")
+            and token["tokenAddress"] not in tracked
+            and not is_seen(memory, token["tokenAddress"], now)
+        ]
+        logging.info("🧠 %d nouveaux tokens sur %d (déjà jugés ignorés)", len(candidates), len(data))
+        scans.progress(0, len(candidates))
+
+        # FILTRES : les règles gratuites (données Moralis) passent avant tout appel RugCheck
+        tokens = []
+        for token in candidates:
+            tokens.append({
+                "address": token["tokenAddress"],
+                "name": token.get("name", ""),
+                "symbol": token.get("symbol", ""),
+                "mc": float(token.get("fullyDilutedValuation") or 0),
+                "lq": float(token.get("liquidity") or 0),
+                "created_at": token.get("createdAt") or token.get("timestamp") or token.get("launchDate"),
+            })
+        survivors, rejected, rejection_counts = filter_engine.evaluate(tokens)
+        judged = {}
+        for token, rule in rejected:
+            mark_seen(verdicts, token["address"], rule.verdict, now)
+            if rule.verdict != "error":
+                judged[token["address"]] = detection_snapshot(token, rule.verdict, rule.name, now)
+        logging.info("🧮 Filtres: %d retenus / %d — rejets par règle: %s", len(survivors), len(tokens), dict(rejection_counts))
+        scans.progress(len(rejected), len(candidates))
+        lq_by_token = {token["address"]: token["lq"] for token in survivors}
+
+    with scans.stage("render"):
+        alerts = []
+        for token in survivors:
+            token_address = token["address"]
+            symbol = token["symbol"]
+            rugscore = token["rugscore"]
+            holders = token["holders"]
+            logging.info("🔎 Token found: %s — MC: %s — Holders: %s", symbol, token['mc'], holders)
+
+            attention = ""
+            if rugscore is not None and rugscore < 40:
+                logging.info("⚠️ Rugscore faible (%s) mais %s holders, token envoyé avec avertissement", rugscore, holders)
                 attention = f"\n⚠️ *ATTENTION : RugScore faible ({rugscore}/100) — DYOR !*"
-            else:
-                logging.info(f"❌ Rugscore too low ({rugscore}) – skipping token (holders: {holders})")
-                memory[token_address] = now
-                continue
-        elif rugscore is not None and rugscore >= 70:
-            attention = f"\n✅ *RugScore élevé ({rugscore}/100) – plutôt rassurant, mais DYOR !*"
-
-        msg = "🚨 *New Token Detected!*\n\n"
-        if name: msg += f"💰 *Name:* {name}\n"
-        if symbol: msg += f"🪙 *Symbol:* ${symbol}\n"
-        if mc: msg += f"📈 *Market Cap:* ${int(mc):,}\n"
-        if volume: msg += f"📊 *Volume (1h):* ${int(volume):,}\n"
-        if holders: msg += f"👥 *Holders:* {holders}\n"
-        if launch_str: msg += launch_str
-        msg += "\n"
-        msg += "🛡️ *Security Check (RugCheck)*\n"
-        msg += f"- {'✅' if lp_locked else '❌'} Liquidity Burned\n"
-        msg += f"- {'✅' if freeze_removed else '❌'} Freeze Authority Removed\n"
-        msg += f"- {'✅' if mint_revoked else '❌'} Mint Authority Revoked\n"
-        msg += f"- {'🔒' if lp_locked else '🔓'} LP Locked\n"
-        if rugscore is not None: msg += f"- 🔥 *RugScore:* {rugscore}/100\n"
-        if risk_label: msg += f"- 🏷️ *RugCheck Label:* {risk_label}\n"
-        if honeypot is not None: msg += f"- {'❌' if honeypot else '✅'} Honeypot: {'Yes' if honeypot else 'No'}\n"
-        msg += attention
-        msg += "\n"
-        if top_holders:
-            msg += "📊 *Top Holders:*\n"
-            msg += "\n".join([f"{i+1}. {pct}%" for i, pct in enumerate(top_holders)])
-            msg += "\n"
-        msg += "\n"
-        if symbol:
-            msg += f"🔎 *Check X:* [Recherche X ${symbol}](https://twitter.com/search?q=%24{symbol}&src=typed_query)\n\n"
-        msg += "📍 *Liens Utiles:*\n"
-        msg += f"- 🌐 Pump.fun: pump.fun/{token_address}\n"
-        msg += "\n"
-        if token_address:
-            msg += "🧬 *Adresse du Token:*\n"
-            msg += f"`{token_address}`\n"
-
-        tracking[token_address] = {
-            "symbol": symbol,
-            "name": name,
-            "initial": mc,
-            "current": mc,
-            "volume": volume,
-            "holders": holders,
-            "rugscore": rugscore,
-            "bonding": get_bonding_curve(token_address),
-            "top_holders": top_holders,
-            "scamr": get_scamr_holders(token_address),
-            "alerts": [],
-            "timestamp": now
-        }
-
-        send_telegram_message(msg, token_address)
-        save_for_analysis(token_address)
-        logging.info(f"✅ Telegram message sent for token: {symbol}")
-
-    # SAUVEGARDE LOCALE
-    save_json(memory, MEMORY_FILE)
-    save_json(tracking, TRACKING_FILE)
-    save_json(wallet_stats, WALLET_STATS_FILE)
-
-    # ENVOI À L'API TENDY (UNE SEULE FOIS!)
-    tokens_list = []
-    for token_address, track in tracking.items():
-        tokens_list.append(track | {"token_address": token_address})
+            elif rugscore is not None and rugscore >= 70:
+                attention = f"\n✅ *RugScore élevé ({rugscore}/100) – plutôt rassurant, mais DYOR !*"
+
+            msg = build_alert_message(token_address, token["name"], symbol, token["mc"], token["volume"], holders,
+                                      format_launch(token["created_at"], now), token["lp_locked"],
+                                      token["freeze_removed"], token["mint_revoked"], rugscore, token["risk_label"],
+                                      token["honeypot"], attention, token["top_holders"])
+            alerts.append((token_address, msg, {
+                "symbol": symbol,
+                "name": token["name"],
+                "initial": token["mc"],
+                "current": token["mc"],
+                "volume": token["volume"],
+                "holders": holders,
+                "rugscore": rugscore,
+                "top_holders": token["top_holders"],
+            }))
+
+    # ENRICHISSEMENT PARALLÈLE (bonding + scamr, uniquement pour les tokens retenus)
+    with scans.stage("enrich"):
+        extra = enrich_sharded(
+            [token_address for token_address, _, _ in alerts],
+            {"bonding": get_bonding_curve, "scamr": get_scamr_holders},
+        )
 
-    try:
-        with open("analyses_history.json", "r", encoding="utf-8") as f:
-            analyses_dict = json.load(f)
-    except Exception:
-        analyses_dict = {}
+    with scans.stage("send"):
+        for token_address, msg, track in alerts:
+            new_tracking[token_address] = {
+                **track,
+                "bonding": extra[token_address]["bonding"],
+                "scamr": extra[token_address]["scamr"],
+                "alerts": [],
+                "timestamp": now
+            }
+
+            mark_seen(verdicts, token_address, "alerted", now)
+            refresher.add(token_address, now)
+            chat_ids = subscriptions.match({
+                "mc": track["initial"], "lq": lq_by_token[token_address],
+                "holders": track["holders"], "rugscore": track["rugscore"],
+            })
+            if chat_ids:
+                send_telegram_message(msg, token_address, chat_ids)
+            analysis_queue.append(token_address)
+            logging.info("✅ Telegram message queued for token: %s", track['symbol'])
+        scans.progress(len(candidates), len(candidates))
+
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("📦 Cache upstream: %s", response_cache.stats())
+
+    # SAUVEGARDE LOCALE (uniquement les entrées modifiées, en une transaction)
+    with scans.stage("persist"):
+        with store.transaction() as tx:
+            store.upsert_many("seen", verdicts, conn=tx)
+            store.upsert_many("tracking", new_tracking, conn=tx)
+        judged.update({token["address"]: detection_snapshot(token, "alerted", None, now) for token in survivors})
+        history.append(judged, now)
+        expired = sweep_seen_index(now)
+        if expired:
+            logging.info("🧹 %d entrées expirées retirées de l'index des tokens vus", expired)
+
+    # ENVOI À L'API TENDY (uniquement les enregistrements modifiés depuis la dernière synchro)
+    with scans.stage("sync"):
+        sync_to_tendy(store)
+
+    return {
+        "scanned": len(data),
+        "candidates": len(candidates),
+        "alerts": len(alerts),
+        "rejections": dict(rejection_counts),
+    }
 
-    send_to_tendy_api(tokens_list, analyses_dict)
-    
+# État du scan publié en base : les instances non leader le servent sur /scan_status
+scans = ScanCoordinator(check_tokens, publish=lambda status: store.set_meta("scan_status", status))
+
+def _queue_depths():
+    return {
+        ("telegram_outbox",): outbox.depth(),
+        ("analysis_inflight",): len(analysis_service.inflight),
+        ("analysis_prewarm",): prewarm.lag(),
+        ("gpt_batch",): batch_analyzer.depth() if batch_analyzer else 0,
+        ("gpt_rate_limited",): openai_limiter.waiting,
+        ("refresher",): refresher.depth(),
+        ("scan_pending",): int(bool(scans.status()["pending"])),
+    }
+
+def _cache_counters(kind):
+    stats = response_cache.stats()
+    return {(source,): values[kind] for source, values in stats.items() if isinstance(values, dict)}
+
+Gauge("pumpfun_queue_depth", "Profondeur des files internes", ("queue",), callback=_queue_depths)
+Gauge("pumpfun_cache_hits", "Hits du cache upstream par source", ("source",), callback=lambda: _cache_counters("hits"))
+Gauge("pumpfun_cache_misses", "Misses du cache upstream par source", ("source",), callback=lambda: _cache_counters("misses"))
+Gauge("pumpfun_cache_hit_rate", "Taux de hit du cache upstream par source", ("source",), callback=lambda: _cache_counters("hit_rate"))
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+def request_scan(reason):
+    # Hors leader, la demande est déposée en base et relevée par le leader
+    if leader_lease.held:
+        return scans.trigger(reason=reason)
+    store.set_meta("scan_request", {"reason": reason, "at": time.time()})
+    return {"status": "forwarded", "leader": leader_lease.current()}
+
+def pick_up_scan_requests():
+    pending = store.get_meta("scan_request")
+    if pending:
+        store.set_meta("scan_request", None)
+        scans.trigger(reason=pending["reason"])
+
+@app.route("/scan_status", methods=["GET"])
+def scan_status():
+    status = scans.status() if leader_lease.held else store.get_meta("scan_status", {})
+    return jsonify({**status, "leader": leader_lease.current(), "is_leader": leader_lease.held,
+                    "forwarded": store.get_meta("scan_request")})
 
 def run_flask():
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port)
 
+HELP_TEXT = (
+    "📘 Commands available:\n"
+    "/scan - Manual scan\n"
+    "/subscribe - Receive alerts in this chat\n"
+    "/unsubscribe - Stop alerts in this chat\n"
+    "/set <mc|lq|holders|rugscore> <min> [max] - Set a threshold\n"
+    "/settings - Show this chat's thresholds\n"
+    "/help - This help message"
+)
+
+def handle_subscription_command(command, args, chat_id):
+    if command == "/subscribe":
+        thresholds = subscriptions.subscribe(chat_id)
+        send_simple_message(f"🔔 Alertes activées.\n{format_thresholds(thresholds)}", chat_id)
+    elif command == "/unsubscribe":
+        subscriptions.unsubscribe(chat_id)
+        send_simple_message("🔕 Alertes désactivées.", chat_id)
+    elif command == "/settings":
+        thresholds = subscriptions.get(chat_id)
+        if thresholds:
+            send_simple_message(f"⚙️ Seuils actuels :\n{format_thresholds(thresholds)}", chat_id)
+        else:
+            send_simple_message("🔕 Ce chat n'est pas abonné. Try /subscribe", chat_id)
+    elif command == "/set":
+        try:
+            dimension = args[0]
+            low = float(args[1])
+            high = float(args[2]) if len(args) > 2 else None
+            if dimension not in DIMENSIONS:
+                raise ValueError(dimension)
+        except (IndexError, ValueError):
+            send_simple_message("⚠️ Usage : /set <mc|lq|holders|rugscore> <min> [max]", chat_id)
+            return
+        thresholds = subscriptions.set_threshold(chat_id, dimension, low, high)
+        send_simple_message(f"✅ Seuil mis à jour.\n{format_thresholds(thresholds)}", chat_id)
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     data = request.get_json()
@@ -379,14 +567,22 @@ def webhook():
     message = data["message"]
     chat_id = message["chat"]["id"]
     text = message.get("text", "")
-    if text == "/scan":
+    command, *args = text.split() or [""]
+    if command in ("/subscribe", "/unsubscribe", "/set", "/settings"):
+        handle_subscription_command(command, args, chat_id)
+    elif command == "/help":
+        send_simple_message(HELP_TEXT, chat_id)
+    elif text == "/scan":
         username = message["from"].get("username", "")
         if username != ADMIN_USER_ID:
             send_simple_message("🚫 Unauthorized", chat_id)
             return jsonify({"status": "unauthorized"})
-        send_simple_message("✅ Scan manuel lancé...", chat_id)
-        check_tokens()
-        send_simple_message("📘 Commands available:\n/scan - Manual scan\n/help - This help message", chat_id)
+        scan = request_scan("telegram")
+        if scan["status"] == "queued":
+            send_simple_message("⏳ Scan déjà en cours, le scan manuel suivra juste après...", chat_id)
+        else:
+            send_simple_message("✅ Scan manuel lancé...", chat_id)
+        send_simple_message(HELP_TEXT, chat_id)
     else:
         send_simple_message("🤖 Unknown command. Try /help", chat_id)
     return jsonify({"status": "ok"})
@@ -398,20 +594,23 @@ def read_secret_file(path):
         with open(path) as f:
             return f.read().strip()
     except Exception as e:
-        logging.error(f"Erreur lecture secret file {path} : {e}")
+        logging.error("Erreur lecture secret file %s : %s", path, e)
         return None
 
-openai_api_key = read_secret_file("/etc/secrets/OPENAI_API_KEY")
-logging.debug("DEBUG OPENAI_API_KEY (file): %r", openai_api_key)
+openai_api_key = read_secret_file("/etc/secrets/OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+logging.debug("DEBUG OPENAI_API_KEY (file): %s", "set" if openai_api_key else None)
 if not openai_api_key:
     raise RuntimeError(
         "❌ ERREUR : la clé OpenAI n'est pas trouvée dans le secret file /etc/secrets/OPENAI_API_KEY. "
         "Vérifie le nom et le contenu du secret file dans Render !"
     )
 client = OpenAI(api_key=openai_api_key)
+# Toutes les requêtes OpenAI (analyse à la demande et pré-calcul groupé) passent par ce limiteur
+openai_limiter = OpenAILimiter()
 
 def ask_gpt(prompt):
     try:
+        openai_limiter.acquire()
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
@@ -435,14 +634,8 @@ def ask_gpt(prompt):
         logging.error("Error calling GPT: %s", e)
         return f"Error calling GPT: {e}"
 
-@app.route("/analyze", methods=["GET"])
-def analyze_token():
-    token_address = request.args.get("token")
-    if not token_address:
-        return "Token address missing", 400
-
-    tracking = load_json(TRACKING_FILE)
-    token_data = tracking.get(token_address)
+def gather_analysis_inputs(token_address):
+    token_data = store.get("tracking", token_address)
     if token_data:
         name = token_data.get('name', token_data.get('symbol', 'N/A'))
         symbol = token_data.get('symbol', 'N/A')
@@ -457,14 +650,14 @@ def analyze_token():
         moralis_url = "https://solana-gateway.moralis.io/token/mainnet/exchange/pumpfun/graduated?limit=100"
         headers = {"Accept": "application/json", "X-API-Key": API_KEY}
         try:
-            response = requests.get(moralis_url, headers=headers, timeout=10)
+            response = http_client.get(moralis_url, headers=headers)
             results = response.json().get("result", [])
             moralis_data = next((item for item in results if item.get("tokenAddress") == token_address), None)
         except Exception as e:
-            return f"Erreur API Moralis: {e}", 500
+            raise AnalysisError(f"Erreur API Moralis: {e}", 500)
 
         if not moralis_data:
-            return "Token not found", 404
+            raise AnalysisError("Token not found", 404)
 
         name = moralis_data.get('name', 'N/A')
         symbol = moralis_data.get('symbol', 'N/A')
@@ -479,27 +672,52 @@ def analyze_token():
     rugcheck_result = get_rugcheck_data(token_address)
     lp_locked = rugcheck_result[2] if rugcheck_result and len(rugcheck_result) > 2 else False
     holders_rug = rugcheck_result[3] if rugcheck_result and len(rugcheck_result) > 3 else None
-    lp_status = "Locked" if lp_locked else "Not locked"
-    smart_wallets = "Oui" if holders_rug and holders_rug > 100 else "Non"
-    mentions = search_twitter_mentions(symbol)
-    top5_distribution = " | ".join([f"{p}%" for p in (top_list[:5] if top_list else [])]) or "N/A"
 
-    prompt = f"""
+    return {
+        "token_address": token_address,
+        "name": name,
+        "symbol": symbol,
+        "market_cap": market_cap,
+        "volume": volume,
+        "bonding_percent": bonding_percent,
+        "holders": holders,
+        "rugscore": rugscore,
+        "lp_status": "Locked" if lp_locked else "Not locked",
+        "smart_wallets": "Oui" if holders_rug and holders_rug > 100 else "Non",
+        "top5_distribution": " | ".join([f"{p}%" for p in (top_list[:5] if top_list else [])]) or "N/A",
+        "mentions": search_twitter_mentions(symbol),
+        "scamr_note": scamr_note,
+    }
+
+def peek_analysis_inputs(token_address):
+    # Métriques de marché telles que gather_analysis_inputs les lit dans le suivi, sans appel réseau
+    token_data = store.get("tracking", token_address)
+    if not token_data:
+        return None
+    return {
+        "market_cap": token_data.get('current', 'N/A'),
+        "volume": token_data.get('volume') or 'N/A',
+        "holders": token_data.get('holders') or 'N/A',
+        "bonding_percent": token_data.get('bonding'),
+    }
+
+def build_analysis_prompt(m):
+    return f"""
 Tu es un expert en trading crypto spécialisé dans les tokens ultra-récents sur Pump.fun (Solana). Tu as l'expérience de TendersAlt : tu appliques des stratégies simples, sans émotions, en t'appuyant sur des probabilités, des setups Fibonacci, et l'observation des wallets.
 Analyse ce token objectivement en te basant sur les infos suivantes :
 
-- Nom du token : {name}
-- Ticker : ${symbol}
-- Market Cap actuel : {market_cap} $
-- Volume 1h : {volume}
-- % de bonding curve rempli : {bonding_percent or 'N/A'}%
-- Nombre de holders : {holders}
-- Rugscore : {rugscore or 'N/A'}/100
-- LP status : {lp_status}
-- Présence de smart wallets : {smart_wallets}
-- Top 5 holders = {top5_distribution}
-- Mentions sur Twitter : {mentions}
-- Score de confiance Scamr.io : {scamr_note}
+- Nom du token : {m['name']}
+- Ticker : ${m['symbol']}
+- Market Cap actuel : {m['market_cap']} $
+- Volume 1h : {m['volume']}
+- % de bonding curve rempli : {m['bonding_percent'] or 'N/A'}%
+- Nombre de holders : {m['holders']}
+- Rugscore : {m['rugscore'] or 'N/A'}/100
+- LP status : {m['lp_status']}
+- Présence de smart wallets : {m['smart_wallets']}
+- Top 5 holders = {m['top5_distribution']}
+- Mentions sur Twitter : {m['mentions']}
+- Score de confiance Scamr.io : {m['scamr_note']}
 
 ---
 ✅ Réponds comme si tu étais un trader pro :
@@ -514,34 +732,162 @@ Analyse ce token objectivement en te basant sur les infos suivantes :
 Sois direct, concis, stratégique, comme si tu devais conseiller un trader qui ne veut pas perdre de temps. Mets en garde si nécessaire.
 """.strip()
 
-    result = ask_gpt(prompt)
-    send_telegram_message(f"🤖 *GPT Analysis – ${symbol}*\n\n{result}", token_address)
-    return jsonify({
-        "prompt": prompt,
-        "analysis": result
-    })
+def notify_analysis(token_address, analysis):
+    send_telegram_message(f"🤖 *GPT Analysis – ${analysis['symbol']}*\n\n{analysis['analysis']}", token_address)
+
+# Pré-calcul groupé : plusieurs tokens par requête GPT, débit vers OpenAI limité (ANALYSIS_BATCH=0 pour désactiver)
+batch_analyzer = BatchAnalyzer(client, limiter=openai_limiter) if os.getenv("ANALYSIS_BATCH", "1") == "1" else None
+
+analysis_service = AnalysisService(store, gather_analysis_inputs, build_analysis_prompt, ask_gpt,
+                                   notify=notify_analysis, batch=batch_analyzer, peek=peek_analysis_inputs)
+
+# Pré-calcul des analyses (et des appels d'enrichissement) avant le clic sur "Analyze with AI"
+prewarm = QueueConsumer(
+    analysis_queue, "prewarm", lambda items: analysis_service.analyze_many([key for key, _ in items]),
+    workers=int(os.getenv("ANALYSIS_PREWARM_WORKERS", "2")), batched=True,
+)
+
+ANALYSIS_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8">{refresh}<title>Analyse {token}</title></head>
+<body style="font-family: sans-serif; max-width: 720px; margin: 2em auto">
+<h3>🤖 Analyse GPT – {token}</h3>
+<pre style="white-space: pre-wrap">{content}</pre>
+</body></html>"""
+
+def analysis_page(job, poll_url):
+    # Le bouton Telegram ouvre un navigateur : page qui se recharge jusqu'à la fin du job
+    if job["status"] == "pending":
+        content, refresh = "⏳ Analyse en cours, la page se met à jour automatiquement...", f'<meta http-equiv="refresh" content="2; url={poll_url}">'
+    elif job["status"] == "error":
+        content, refresh = f"❌ {job.get('error')}", ""
+    else:
+        content, refresh = job["analysis"], ""
+    return ANALYSIS_PAGE.format(refresh=refresh, token=html.escape(job["token"]), content=html.escape(content))
+
+def analysis_job_response(job):
+    body = {key: value for key, value in job.items() if key != "code"}
+    body["poll"] = f"{request.host_url.rstrip('/')}/analyze/jobs/{job['id']}"
+    status = {"pending": 202, "error": job.get("code", 500)}.get(job["status"], 200)
+    # Accept: */* (curl, requests) reçoit du JSON ; seul un navigateur qui préfère le HTML reçoit la page
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+        return analysis_page(job, body["poll"]), status, {"Content-Type": "text/html; charset=utf-8"}
+    return jsonify(body), status
+
+@app.route("/analyze", methods=["GET"])
+def analyze_token():
+    token_address = request.args.get("token")
+    if not token_address:
+        return "Token address missing", 400
+    return analysis_job_response(analysis_service.submit(token_address))
+
+@app.route("/analyze/jobs/<job_id>", methods=["GET"])
+def analyze_job_status(job_id):
+    job = analysis_service.get_job(job_id)
+    if job is None:
+        return "Job not found", 404
+    return analysis_job_response(job)
+
+def on_graduated_tokens(new_tokens, page_tokens):
+    # Tokens de la page déjà passés sous le watermark mais sans verdict valide ni suivi :
+    # verdict expiré (filtered_mc, error) ou scan précédent échoué avant la persistance
+    new_addresses = {token.get("tokenAddress") for token in new_tokens}
+    previous = [token for token in page_tokens if token.get("tokenAddress") and token["tokenAddress"] not in new_addresses]
+    addresses = [token["tokenAddress"] for token in previous]
+    verdicts = store.get_many("seen", addresses)
+    tracked = store.get_many("tracking", addresses)
+    now = time.time()
+    revisit = [
+        token for token in previous
+        if token["tokenAddress"] not in tracked and not is_seen(verdicts, token["tokenAddress"], now)
+    ]
+    if new_tokens or revisit:
+        scans.trigger(new_tokens + revisit, reason="feed")
+
+bonding_events = EventLog(EVENT_LOG_FILE)
+
+def consume_bonding_events(scheduler, jobs):
+    offset = store.get_meta("bonding_events_offset", 0)
+    events, offset = bonding_events.read_from(offset)
+    store.set_meta("bonding_events_offset", offset)
+    # Un token qui quitte la bonding curve vient probablement de graduer : on interroge Moralis tout de suite
+    exits = [address for event_type, _, _, address in events if event_type == EVENT_EXIT]
+    if exits:
+        logging.info("⛓ %s tokens sortis de la bonding curve, poll graduated anticipé", len(exits))
+        scheduler.poke("graduated")
+        jobs.wake("feeds")
+
+INGEST_MODE = os.getenv("INGEST_MODE", "poll")
+MORALIS_PAIRS_URL = "https://solana-gateway.moralis.io/token/mainnet/{}/pairs"
+STREAM_NAMES_MAX = 10000
+# Hydratation des graduations en direct : pool borné, une rafale reste en file au lieu d'ouvrir un thread par event
+stream_ingest = ThreadPoolExecutor(max_workers=int(os.getenv("STREAM_INGEST_WORKERS", "4")), thread_name_prefix="stream-ingest")
+stream_names = OrderedDict()
+
+def hydrate_stream_token(event):
+    # Un event "complete" ne porte ni MC ni liquidité : on les prend sur la paire Moralis
+    response = http_client.get(MORALIS_PAIRS_URL.format(event["mint"]), headers=HEADERS)
+    pairs = response.json().get("pairs", []) if response.status_code == 200 else []
+    if not pairs:
+        return None
+    pair = max(pairs, key=lambda p: p.get("liquidityUsd") or 0)
+    name, symbol = stream_names.get(event["mint"], ("", ""))
+    return {
+        "tokenAddress": event["mint"],
+        "name": name,
+        "symbol": symbol,
+        "fullyDilutedValuation": float(pair.get("usdPrice") or 0) * PUMPFUN_SUPPLY,
+        "liquidity": pair.get("liquidityUsd"),
+        "graduatedAt": event.get("timestamp"),
+    }
+
+def ingest_graduation(event, jobs):
+    try:
+        token = hydrate_stream_token(event)
+    except Exception as e:
+        logging.error("❌ Hydratation stream impossible pour %s: %s", event["mint"], e)
+        token = None
+    if token is None:
+        # Moralis n'a pas encore indexé le token : le poll graduated prendra le relais
+        jobs.wake("feeds")
+        return
+    scans.trigger([token], reason="stream")
+
+def on_stream_event(event, jobs):
+    if event["type"] == "create":
+        stream_names[event["mint"]] = (event["name"], event["symbol"])
+        while len(stream_names) > STREAM_NAMES_MAX:
+            stream_names.popitem(last=False)
+    elif event["type"] == "complete":
+        logging.info("🎓 Graduation détectée en direct: %s", event["mint"])
+        stream_ingest.submit(ingest_graduation, event, jobs)
+
+def start_stream(jobs):
+    from pumpfun_stream import PumpfunStream
+    url = os.getenv("SOLANA_WS_URL") or (f"wss://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}" if HELIUS_API_KEY else None)
+    if not url:
+        logging.error("❌ INGEST_MODE=stream sans SOLANA_WS_URL ni HELIUS_API_KEY, polling Moralis seul")
+        return
+    PumpfunStream(lambda event: on_stream_event(event, jobs), url=url).start()
 
 def start_loop():
-    current_time = datetime.now()
-    if current_time.hour in [6, 20] and current_time.minute < 2:
-        send_daily_winners()
-    while True:
-        check_tokens()
-        time.sleep(120)
+    outbox.start()
+    refresher.start()
+    prewarm.start()
+    jobs = JobScheduler()
+    scheduler = FeedScheduler([
+        FeedPoller("graduated", "graduated", HEADERS, on_graduated_tokens, store, timestamp_field="graduatedAt"),
+    ])
+    scheduler.add(bonding_poller(HEADERS, store, on_events=lambda: consume_bonding_events(scheduler, jobs)))
+    jobs.add("feeds", scheduler.run_once, dynamic=True)
+    if INGEST_MODE == "stream":
+        start_stream(jobs)
+    jobs.add("daily_winners", send_daily_winners, CronSchedule("0 6,20 * * *"))
+    jobs.add("scan_requests", pick_up_scan_requests, IntervalSchedule(5))
+    jobs.run_forever()
 
 def send_daily_winners():
-    tracking = load_json(TRACKING_FILE)
     now = datetime.now()
-    winners = []
-    for token_address, data in tracking.items():
-        symbol = data.get("symbol", "N/A")
-        initial = data.get("initial", 0)
-        current = data.get("current", initial)
-        if initial > 0 and current > initial:
-            multiplier = round(current / initial, 2)
-            winners.append((symbol, multiplier, token_address))
-    winners.sort(key=lambda x: x[1], reverse=True)
-    top_winners = winners[:3]
+    top_winners = winners_index.top(3)
     if top_winners:
         msg = f"🏆 *Top Tokens Since Detection – {now.strftime('%Y-%m-%d')}*\n"
         for i, (symbol, mult, _) in enumerate(top_winners, 1):
@@ -549,6 +895,9 @@ def send_daily_winners():
         send_simple_message(msg.strip(), CHAT_ID)
 
 if __name__ == "__main__":
-    logging.info(f"Bot lancé depuis : {os.getcwd()}")
+    logging.info("Bot lancé depuis : %s", os.getcwd())
     Thread(target=run_flask, daemon=True).start()
+    if not leader_lease.wait_until_leader(timeout=5):
+        logging.info("⏳ %s en attente du bail scanner (leader actuel : %s)", leader_lease.holder, leader_lease.current())
+        leader_lease.wait_until_leader()
     start_loop()
@@ -0,0 +1,137 @@
+import os
+import time
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _labels_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+
+def _reset_locks():
+    # Un processus forké hérite des verrous dans l'état où le parent les tenait
+    for metric in _registry:
+        metric._lock = Lock()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, value in self.samples():
+            lines.append(f"{name}{_labels_text(self.label_names, key)} {value}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        # callback() -> {tuple de labels: valeur}, évalué à chaque scrape
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        try:
+            values = self.callback()
+        except Exception as e:
+            logging.error("❌ Metrics callback error for %s: %s", self.name, e)
+            return []
+        return [(self.name, key if isinstance(key, tuple) else (key,), value) for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels_text(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels_text(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_labels_text(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_labels_text(self.label_names, key)} {count}")
+        return "\n".join(lines)
+
+
+def render():
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+UPSTREAM_LATENCY = Histogram("pumpfun_upstream_request_seconds", "Latence des appels upstream", ("host", "status"))
+UPSTREAM_ERRORS = Counter("pumpfun_upstream_errors_total", "Erreurs réseau et circuits ouverts par upstream", ("host", "kind"))
+SCAN_STAGE = Histogram("pumpfun_scan_stage_seconds", "Durée de chaque étape de check_tokens", ("stage",))
+SCAN_RUNS = Counter("pumpfun_scan_runs_total", "Scans exécutés", ("status",))
+FILTER_REJECTIONS = Counter("pumpfun_filter_rejections_total", "Tokens rejetés par règle de filtrage", ("rule",))
+
+os.register_at_fork(after_in_child=_reset_locks)
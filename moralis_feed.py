@@ -0,0 +1,131 @@
+import time
+import random
+import logging
+from datetime import datetime
+from threading import Event
+
+import http_client
+
+MORALIS_BASE = "https://solana-gateway.moralis.io/token/mainnet/exchange/pumpfun"
+PAGE_LIMIT = 100
+MAX_PAGES = 3
+ERROR_BACKOFF_MAX = 600
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e12 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class FeedPoller:
+    def __init__(self, name, endpoint, headers, handler, store, timestamp_field=None,
+                 min_interval=15, base_interval=120, max_interval=300):
+        self.name = name
+        self.url = f"{MORALIS_BASE}/{endpoint}"
+        self.headers = headers
+        self.handler = handler
+        self.store = store
+        self.timestamp_field = timestamp_field
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = base_interval
+        self.errors = 0
+        self.next_due = 0
+        self.watermark = store.get_meta(f"feed_watermark:{name}")
+        self.known = set()
+
+    def _fetch(self):
+        items = []
+        cursor = None
+        for _ in range(MAX_PAGES):
+            params = {"limit": PAGE_LIMIT}
+            if cursor:
+                params["cursor"] = cursor
+            response = http_client.get(self.url, headers=self.headers, params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            body = response.json()
+            page = body.get("result", [])
+            items.extend(page)
+            cursor = body.get("cursor")
+            # On ne suit le curseur que si toute la page est plus récente que le dernier vu
+            if not cursor or self.watermark is None or not self.timestamp_field:
+                break
+            oldest = min((_timestamp(item.get(self.timestamp_field)) or 0 for item in page), default=0)
+            if oldest <= self.watermark:
+                break
+        return items
+
+    def _new_items(self, items):
+        if self.timestamp_field:
+            if self.watermark is None:
+                return items
+            return [item for item in items if (_timestamp(item.get(self.timestamp_field)) or 0) > self.watermark]
+        return [item for item in items if item.get("tokenAddress") not in self.known]
+
+    def poll(self):
+        try:
+            items = self._fetch()
+        except Exception as e:
+            self.errors += 1
+            delay = min(ERROR_BACKOFF_MAX, self.interval * 2 ** self.errors)
+            delay = random.uniform(delay / 2, delay)
+            logging.error("❌ Moralis %s error: %s — prochain essai dans %ss", self.name, e, int(delay))
+            self.next_due = time.monotonic() + delay
+            return
+        self.errors = 0
+        new_items = self._new_items(items)
+        try:
+            self.handler(new_items, items)
+        except Exception as e:
+            logging.error("❌ Feed %s handler error: %s", self.name, e)
+
+        if self.timestamp_field:
+            stamps = [_timestamp(item.get(self.timestamp_field)) for item in items]
+            stamps = [stamp for stamp in stamps if stamp is not None]
+            if stamps and (self.watermark is None or max(stamps) > self.watermark):
+                self.watermark = max(stamps)
+                self.store.set_meta(f"feed_watermark:{self.name}", self.watermark)
+        self.known = {item.get("tokenAddress") for item in items}
+
+        # Intervalle adaptatif : on accélère quand des tokens arrivent, on ralentit sinon
+        if new_items:
+            self.interval = max(self.min_interval, self.interval * 0.7)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.3)
+        logging.info("📡 Feed %s: %s nouveaux / %s — prochain poll dans %ss", self.name, len(new_items), len(items), int(self.interval))
+        self.next_due = time.monotonic() + self.interval
+
+
+class FeedScheduler:
+    def __init__(self, pollers):
+        self.pollers = {poller.name: poller for poller in pollers}
+        self._wakeup = Event()
+
+    def add(self, poller):
+        self.pollers[poller.name] = poller
+
+    def poke(self, name):
+        poller = self.pollers.get(name)
+        if poller is not None:
+            poller.next_due = 0
+            self._wakeup.set()
+
+    def run_once(self):
+        now = time.monotonic()
+        for poller in self.pollers.values():
+            if poller.next_due <= now:
+                poller.poll()
+        next_due = min(poller.next_due for poller in self.pollers.values())
+        return max(0, next_due - time.monotonic())
+
+    def run_forever(self):
+        while True:
+            self._wakeup.wait(timeout=self.run_once())
+            self._wakeup.clear()
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import base64
+import struct
+import asyncio
+import hashlib
+import logging
+import argparse
+from threading import Thread
+
+import websockets
+from solders.pubkey import Pubkey
+
+from http_client import backoff_delay
+
+PUMPFUN_PROGRAM_ID = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+HELIUS_API_KEY = os.getenv("HELIUS_API_KEY")
+WS_URL = os.getenv("SOLANA_WS_URL") or (f"wss://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}" if HELIUS_API_KEY else None)
+PROGRAM_DATA_PREFIX = "Program data: "
+
+
+def _discriminator(name):
+    # Discriminateur Anchor d'un event : sha256("event:<Nom>")[:8]
+    return hashlib.sha256(f"event:{name}".encode()).digest()[:8]
+
+
+CREATE_EVENT = _discriminator("CreateEvent")
+COMPLETE_EVENT = _discriminator("CompleteEvent")
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def string(self):
+        (length,) = struct.unpack_from("<I", self.data, self.offset)
+        self.offset += 4
+        value = self.data[self.offset:self.offset + length].decode("utf-8", errors="replace")
+        self.offset += length
+        return value
+
+    def pubkey(self):
+        value = Pubkey.from_bytes(self.data[self.offset:self.offset + 32])
+        self.offset += 32
+        return str(value)
+
+    def i64(self):
+        (value,) = struct.unpack_from("<q", self.data, self.offset)
+        self.offset += 8
+        return value
+
+
+def decode_event(data):
+    discriminator, reader = data[:8], _Reader(data[8:])
+    try:
+        if discriminator == CREATE_EVENT:
+            return {
+                "type": "create",
+                "name": reader.string(),
+                "symbol": reader.string(),
+                "uri": reader.string(),
+                "mint": reader.pubkey(),
+                "bonding_curve": reader.pubkey(),
+                "user": reader.pubkey(),
+            }
+        if discriminator == COMPLETE_EVENT:
+            return {
+                "type": "complete",
+                "user": reader.pubkey(),
+                "mint": reader.pubkey(),
+                "bonding_curve": reader.pubkey(),
+                "timestamp": reader.i64(),
+            }
+    except (struct.error, ValueError) as e:
+        logging.warning("⚠️ Event pump.fun illisible: %s", e)
+    return None
+
+
+def decode_notification(message):
+    value = message.get("params", {}).get("result", {}).get("value", {})
+    if value.get("err"):
+        return []
+    events = []
+    for line in value.get("logs") or []:
+        if not line.startswith(PROGRAM_DATA_PREFIX):
+            continue
+        try:
+            data = base64.b64decode(line[len(PROGRAM_DATA_PREFIX):])
+        except ValueError:
+            continue
+        event = decode_event(data)
+        if event is not None:
+            event["signature"] = value.get("signature")
+            events.append(event)
+    return events
+
+
+def subscribe_request(request_id=1):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "logsSubscribe",
+        "params": [{"mentions": [PUMPFUN_PROGRAM_ID]}, {"commitment": "confirmed"}],
+    }
+
+
+class PumpfunStream:
+    def __init__(self, on_event, url=WS_URL, record_path=None):
+        self.on_event = on_event
+        self.url = url
+        self.record_path = record_path
+        self.connected = False
+        self.reconnects = 0
+        self.events = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=lambda: asyncio.run(self.run()), name="pumpfun-stream", daemon=True)
+            self._thread.start()
+
+    async def run(self):
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, ping_timeout=20, max_size=None) as ws:
+                    # (Re)souscription à chaque connexion
+                    await ws.send(json.dumps(subscribe_request()))
+                    self.connected = True
+                    attempt = 0
+                    logging.info("🔌 Stream pump.fun connecté (%s)", PUMPFUN_PROGRAM_ID)
+                    async for raw in ws:
+                        self._handle(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error("❌ Stream pump.fun déconnecté: %s", e)
+            self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(backoff_delay(attempt, base=1, cap=60))
+            attempt += 1
+
+    def _handle(self, raw):
+        message = json.loads(raw)
+        if message.get("method") != "logsNotification":
+            return
+        if self.record_path:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(message) + "\n")
+        for event in decode_notification(message):
+            self.events += 1
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logging.error("❌ Stream event handler error: %s", e)
+
+
+async def serve_replay(notifications_path, host="127.0.0.1", port=8901, interval=0.0):
+    # Stand-in websocket local : accepte logsSubscribe puis rejoue les notifications enregistrées
+    with open(notifications_path, encoding="utf-8") as f:
+        notifications = [json.loads(line) for line in f if line.strip()]
+
+    async def handler(ws, *args):
+        request = json.loads(await ws.recv())
+        subscription = 1
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": subscription}))
+        for notification in notifications:
+            notification.setdefault("params", {})["subscription"] = subscription
+            await ws.send(json.dumps(notification))
+            if interval:
+                await asyncio.sleep(interval)
+        await ws.wait_closed()
+
+    async with websockets.serve(handler, host, port):
+        logging.info("🎞️ Replay websocket sur ws://%s:%d (%d notifications)", host, port, len(notifications))
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="Flux temps réel des events pump.fun")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listen = sub.add_parser("listen", help="Affiche les events décodés")
+    listen.add_argument("--url", default=WS_URL)
+    listen.add_argument("--record", default=None, help="Enregistre les notifications brutes (JSONL)")
+    replay = sub.add_parser("replay-server", help="Rejoue des notifications enregistrées")
+    replay.add_argument("--notifications", required=True)
+    replay.add_argument("--port", type=int, default=8901)
+    replay.add_argument("--interval", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "replay-server":
+        asyncio.run(serve_replay(args.notifications, port=args.port, interval=args.interval))
+        sys.exit(0)
+    if not args.url:
+        sys.exit("SOLANA_WS_URL ou HELIUS_API_KEY requis")
+    stream = PumpfunStream(lambda event: print(json.dumps(event)), url=args.url, record_path=args.record)
+    try:
+        asyncio.run(stream.run())
+    except KeyboardInterrupt:
+        print(f"{stream.events} events, {stream.reconnects} reconnexions — {time.strftime('%H:%M:%S')}")
@@ -0,0 +1,33 @@
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def available(self):
+        self._refill(time.monotonic())
+        return int(self.tokens)
+
+    def consume(self, count=1):
+        self._refill(time.monotonic())
+        self.tokens -= count
+
+    def pause(self, seconds):
+        # Après un 429 : bucket vidé jusqu'à la fin du retry_after
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
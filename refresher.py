@@ -0,0 +1,148 @@
+import os
+import time
+import heapq
+import logging
+from threading import Lock, Thread
+
+import http_client
+from rate_limit import TokenBucket
+
+PRICES_URL = "https://solana-gateway.moralis.io/token/mainnet/prices"
+PRICE_BATCH_SIZE = 100
+# Supply fixe des tokens pump.fun : MC = prix * 1 milliard
+PUMPFUN_SUPPLY = 1_000_000_000
+
+CALLS_PER_MINUTE = int(os.getenv("REFRESH_CALLS_PER_MINUTE", "60"))
+# Appels RugCheck (holders, volume) : budget séparé de celui des prix Moralis
+DETAIL_CALLS_PER_MINUTE = int(os.getenv("REFRESH_DETAIL_CALLS_PER_MINUTE", "30"))
+MAX_AGE = int(os.getenv("REFRESH_MAX_AGE", str(7 * 24 * 3600)))
+DEAD_MC = float(os.getenv("REFRESH_DEAD_MC", "3000"))
+TICK = 5
+
+# (âge max en secondes, intervalle de rafraîchissement) : les tokens jeunes passent en premier
+REFRESH_TIERS = [
+    (3600, 60),
+    (6 * 3600, 300),
+    (24 * 3600, 900),
+    (None, 3600),
+]
+HIGH_MOVER_PCT = 20
+
+
+def refresh_interval(age, move_pct):
+    interval = next(interval for max_age, interval in REFRESH_TIERS if max_age is None or age < max_age)
+    if move_pct is not None and abs(move_pct) >= HIGH_MOVER_PCT:
+        interval = max(REFRESH_TIERS[0][1], interval // 4)
+    return interval
+
+
+class MarkToMarketRefresher:
+    def __init__(self, store, headers, details_fetcher=None, on_update=None):
+        self.store = store
+        self.headers = headers
+        # details_fetcher(adresse) -> (holders, volume), ex. via RugCheck (en cache)
+        self.details_fetcher = details_fetcher
+        self.on_update = on_update
+        self.budget = TokenBucket(CALLS_PER_MINUTE / 60, capacity=CALLS_PER_MINUTE)
+        self.detail_budget = TokenBucket(DETAIL_CALLS_PER_MINUTE / 60, capacity=DETAIL_CALLS_PER_MINUTE)
+        self._queue = []
+        self._lock = Lock()
+        self._thread = None
+        now = time.time()
+        for token_address, track in store.items("tracking"):
+            self.add(token_address, track.get("timestamp", now), due=now)
+
+    def add(self, token_address, detected_at, due=None):
+        due = due if due is not None else detected_at + refresh_interval(0, None)
+        with self._lock:
+            heapq.heappush(self._queue, (due, token_address, detected_at))
+
+    def depth(self):
+        with self._lock:
+            return len(self._queue)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="mtm-refresher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logging.error("❌ Refresher error: %s", e)
+            time.sleep(TICK)
+
+    def _pop_due(self, now, limit):
+        due = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now and len(due) < limit:
+                due.append(heapq.heappop(self._queue))
+        return due
+
+    def fetch_prices(self, token_addresses):
+        response = http_client.post(PRICES_URL, headers=self.headers, json={"addresses": token_addresses})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return {item.get("tokenAddress"): item.get("usdPrice") for item in response.json() if item.get("usdPrice")}
+
+    def refresh_due(self):
+        now = time.time()
+        batches = self.budget.available()
+        if batches < 1:
+            return 0
+        due = self._pop_due(now, batches * PRICE_BATCH_SIZE)
+        if not due:
+            return 0
+        tracks = self.store.get_many("tracking", [token_address for _, token_address, _ in due])
+        updates = {}
+        evicted = []
+        for i in range(0, len(due), PRICE_BATCH_SIZE):
+            chunk = [entry for entry in due[i:i + PRICE_BATCH_SIZE] if entry[1] in tracks]
+            if not chunk:
+                continue
+            if self.budget.available() < 1:
+                # Budget épuisé : le reste repart dans le tas, traité au prochain tick
+                for _, token_address, detected_at in due[i:]:
+                    if token_address in tracks:
+                        self.add(token_address, detected_at, due=now)
+                break
+            self.budget.consume()
+            try:
+                prices = self.fetch_prices([token_address for _, token_address, _ in chunk])
+            except Exception as e:
+                logging.error("❌ Moralis prices error: %s", e)
+                for _, token_address, detected_at in chunk:
+                    self.add(token_address, detected_at, due=now + 60)
+                continue
+            for _, token_address, detected_at in chunk:
+                track = tracks[token_address]
+                age = now - detected_at
+                previous = track.get("current") or 0
+                price = prices.get(token_address)
+                if price is not None:
+                    track["current"] = float(price) * PUMPFUN_SUPPLY
+                # Les tokens morts ou trop vieux sortent du suivi
+                if age > MAX_AGE or (age > 24 * 3600 and (track.get("current") or 0) < DEAD_MC):
+                    evicted.append(token_address)
+                    continue
+                if self.details_fetcher and self.detail_budget.available() >= 1:
+                    self.detail_budget.consume()
+                    holders, volume = self.details_fetcher(token_address)
+                    if holders:
+                        track["holders"] = holders
+                    if volume:
+                        track["volume"] = volume
+                track["updated_at"] = now
+                updates[token_address] = track
+                move_pct = 100 * (track["current"] - previous) / previous if previous else None
+                self.add(token_address, detected_at, due=now + refresh_interval(age, move_pct))
+
+        with self.store.transaction() as tx:
+            self.store.upsert_many("tracking", updates, conn=tx)
+            self.store.delete_many("tracking", evicted, conn=tx)
+        if self.on_update:
+            self.on_update(updates, evicted)
+        logging.info("💹 Mark-to-market: %s tokens mis à jour, %s évincés", len(updates), len(evicted))
+        return len(updates)
@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import time
+import re
+import random
+import argparse
+import logging
+from threading import Lock, Thread
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+
+DEFAULT_FIXTURES = "fixtures/upstream.jsonl"
+BOT_TOKEN_PATH = re.compile(r"^/bot[^/]+/")
+
+
+class Recorder:
+    # Capture les réponses upstream (via http_client.set_recorder) dans un fichier JSONL
+    def __init__(self, path=DEFAULT_FIXTURES):
+        self.path = path
+        self._lock = Lock()
+
+    def __call__(self, method, url, params, response):
+        parts = urlsplit(url)
+        entry = {"method": method, "host": parts.hostname}
+        if BOT_TOKEN_PATH.match(parts.path):
+            # Le token du bot Telegram est dans le chemin : jamais écrit, rejoué par préfixe
+            entry["path_prefix"] = "/bot"
+        else:
+            entry["path"] = parts.path
+        entry.update({
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.text,
+        })
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        http_client.set_recorder(self)
+        return self
+
+
+def load_fixtures(path):
+    exact = {}
+    prefixes = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "path_prefix" in entry:
+                prefixes.append(entry)
+            else:
+                exact.setdefault((entry["method"], entry["host"], entry["path"]), []).append(entry)
+    return exact, prefixes
+
+
+CHAT_COMPLETION = {
+    "id": "chatcmpl-replay",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Analyse rejouée (stub)."}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+}
+
+
+class StubServer:
+    def __init__(self, fixtures_path=DEFAULT_FIXTURES, latency_ms=0, jitter_ms=0, error_rate=0.0, port=0):
+        self.exact, self.prefixes = load_fixtures(fixtures_path)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._cursors = {}
+        self._lock = Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def chat_completion(self, body):
+        # Mode JSON (analyse groupée) : un verdict factice par token de la requête
+        try:
+            request = json.loads(body or "{}")
+        except ValueError:
+            request = {}
+        completion = json.loads(json.dumps(CHAT_COMPLETION))
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            try:
+                tokens = json.loads(request["messages"][-1]["content"]).get("tokens", [])
+            except (KeyError, IndexError, TypeError, ValueError):
+                tokens = []
+            completion["choices"][0]["message"]["content"] = json.dumps({"verdicts": [
+                {"token": token.get("token"), "setup": "Verdict rejoué (stub).", "entry_mc": None,
+                 "stop_loss": "-30%", "allocation_pct": "1%", "exit_signal": "x2", "manipulation": None}
+                for token in tokens
+            ]})
+        return {"status": 200, "content_type": "application/json", "body": json.dumps(completion)}
+
+    def match(self, method, host, path, body=None):
+        with self._lock:
+            self.requests += 1
+            entries = self.exact.get((method, host, path))
+            if entries:
+                # Plusieurs captures pour la même URL : rejouées dans l'ordre, en boucle
+                cursor = self._cursors.get((method, host, path), 0)
+                self._cursors[(method, host, path)] = cursor + 1
+                return entries[cursor % len(entries)]
+        for entry in self.prefixes:
+            if entry["method"] == method and entry.get("host") in (None, host) and path.startswith(entry["path_prefix"]):
+                return entry
+        if method == "POST" and path.endswith("/chat/completions"):
+            return self.chat_completion(body)
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8", "replace") if length else None
+                delay = stub.latency_ms + random.uniform(-stub.jitter_ms, stub.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+                if stub.error_rate and random.random() < stub.error_rate:
+                    self._reply(503, "application/json", '{"error": "injected"}')
+                    return
+                host = self.headers.get("X-Upstream-Host") or self.headers.get("Host", "").split(":")[0]
+                entry = stub.match(self.command, host, urlsplit(self.path).path, body)
+                if entry is None:
+                    self._reply(404, "application/json", '{"error": "no fixture"}')
+                    return
+                self._reply(entry["status"], entry.get("content_type", "application/json"), entry["body"])
+
+            def _reply(self, status, content_type, body):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        Thread(target=self.server.serve_forever, name="replay-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def _fake_address(i):
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    rng = random.Random(i)
+    return "".join(rng.choice(alphabet) for _ in range(40)) + "pump"
+
+
+def synthesize(path, tokens=100, seed=1):
+    # Fixtures synthétiques réalistes quand aucune capture n'est disponible
+    rng = random.Random(seed)
+    now = time.time()
+    entries = []
+    graduated = []
+    for i in range(tokens):
+        address = _fake_address(i)
+        graduated.append({
+            "tokenAddress": address,
+            "name": f"Token {i}",
+            "symbol": f"TK{i}",
+            "fullyDilutedValuation": str(rng.choice([20000, 60000, 120000, 400000])),
+            "liquidity": str(rng.choice([5000, 12000, 30000])),
+            "graduatedAt": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(now - i * 30)),
+            "createdAt": int((now - i * 30 - 3600) * 1000),
+        })
+        report = {
+            "score_normalised": rng.randint(10, 95),
+            "risks": [{"name": "Honeypot"}] if rng.random() < 0.05 else [],
+            "markets": [{"lp": {"lpLockedPct": rng.choice([0, 100]), "lpLockedUSD": 20000, "quoteUSD": rng.randint(5000, 80000)}}],
+            "totalHolders": rng.randint(20, 1500),
+            "topHolders": [{"pct": rng.uniform(1, 40)} for _ in range(5)],
+            "freezeAuthority": None,
+            "mintAuthority": None,
+        }
+        entries.append({"method": "GET", "host": "api.rugcheck.xyz", "path": f"/v1/tokens/{address}/report",
+                        "status": 200, "body": json.dumps(report)})
+        entries.append({"method": "GET", "host": "api.callstaticrpc.com", "path": f"/pumpfun/v1/token/{address}",
+                        "status": 200, "body": json.dumps({"bondingCurve": {"percentageComplete": 1.0}})})
+        entries.append({"method": "GET", "host": "ai.scamr.xyz", "path": f"/token/{address}",
+                        "status": 200, "content_type": "text/html", "body": f"<html><p>Score: {rng.randint(1, 100)}</p></html>"})
+        entries.append({"method": "GET", "host": "app.bubblemaps.io", "path": f"/api/token/sol/{address}",
+                        "status": 200, "body": json.dumps({"holders": [{"share": rng.uniform(0.01, 0.2)} for _ in range(5)]})})
+    base = "/token/mainnet/exchange/pumpfun"
+    entries.append({"method": "GET", "host": "solana-gateway.moralis.io", "path": f"{base}/graduated",
+                    "status": 200, "body": json.dumps({"result": graduated})})
+    entries.append({"method": "GET", "host": "solana-gateway.moralis.io", "path": f"{base}/bonding",
+                    "status": 200, "body": json.dumps({"result": [{"tokenAddress": _fake_address(10_000 + i)} for i in range(tokens)]})})
+    entries.append({"method": "POST", "host": "solana-gateway.moralis.io", "path": "/token/mainnet/prices",
+                    "status": 200, "body": json.dumps([{"tokenAddress": t["tokenAddress"], "usdPrice": 0.0001} for t in graduated])})
+    entries.append({"method": "POST", "host": "api.telegram.org", "path_prefix": "/bot",
+                    "status": 200, "body": json.dumps({"ok": True, "result": {}})})
+    entries.append({"method": "POST", "host": "tendy-api.onrender.com", "path_prefix": "/",
+                    "status": 200, "body": "{}"})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return len(entries)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="Rejeu hors-ligne des réponses upstream")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Lance le stub de rejeu")
+    serve.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    serve.add_argument("--port", type=int, default=8900)
+    serve.add_argument("--latency-ms", type=float, default=0)
+    serve.add_argument("--jitter-ms", type=float, default=0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    synth = sub.add_parser("synth", help="Génère des fixtures synthétiques")
+    synth.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    synth.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        print(f"{synthesize(args.fixtures, args.tokens)} réponses écrites dans {args.fixtures}")
+        sys.exit(0)
+    stub = StubServer(args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate, args.port)
+    print(f"Stub de rejeu sur {stub.url} — HTTP_UPSTREAM_OVERRIDE={stub.url}")
+    stub.server.serve_forever()
@@ -0,0 +1,96 @@
+import os
+import logging
+from collections import Counter
+
+from metrics import FILTER_REJECTIONS
+
+MIN_MARKET_CAP = 45000
+MIN_LIQUIDITY = 8000
+MIN_HOLDERS = 80
+MAX_TOP_HOLDER_PCT = 30
+MIN_RUGSCORE = 40
+RUGSCORE_HOLDERS_EXCEPTION = 500
+# "onchain" : distribution des holders lue directement via RPC, avant RugCheck
+TOP_HOLDERS_SOURCE = os.getenv("TOP_HOLDERS_SOURCE", "rugcheck")
+
+# Coût relatif d'obtention de chaque source de données
+SOURCE_COST = {
+    "moralis": 0,
+    "onchain": 5,
+    "rugcheck": 10,
+}
+
+
+class Rule:
+    def __init__(self, name, needs, rejects, verdict, message):
+        self.name = name
+        self.needs = needs
+        self.rejects = rejects
+        self.verdict = verdict
+        self.message = message
+
+    def cost(self):
+        return max(SOURCE_COST[source] for source in self.needs)
+
+
+FILTER_RULES = [
+    Rule("market_cap", ("moralis",), lambda t: t["mc"] < MIN_MARKET_CAP,
+         "filtered_mc", "❌ Filtered out due to MC ({mc})"),
+    Rule("liquidity", ("moralis",), lambda t: t["lq"] < MIN_LIQUIDITY,
+         "filtered_mc", "❌ Filtered out due to liquidity ({lq})"),
+    Rule("rugcheck_unavailable", ("rugcheck",), lambda t: not t.get("rugcheck_ok", True),
+         "error", "⏳ RugCheck indisponible pour {address}, nouvel essai au prochain cycle"),
+    Rule("top_holder", (TOP_HOLDERS_SOURCE,), lambda t: bool(t["top_holders"]) and t["top_holders"][0] >= MAX_TOP_HOLDER_PCT,
+         "rejected", "❌ Top holder >= 30% ({top_holders[0]}%) – skipping token"),
+    Rule("holders", ("rugcheck",), lambda t: t["holders"] is not None and t["holders"] < MIN_HOLDERS,
+         "filtered_mc", "❌ Filtered out due to holders ({holders})"),
+    Rule("honeypot", ("rugcheck",), lambda t: bool(t["honeypot"]),
+         "rejected", "⚠️ Honeypot detected, skipping token"),
+    Rule("lp_locked", ("rugcheck",), lambda t: not t["lp_locked"],
+         "rejected", "❌ LP not locked – token skipped"),
+    Rule("rugscore", ("rugcheck",),
+         lambda t: t["rugscore"] is not None and t["rugscore"] < MIN_RUGSCORE
+         and not (t["holders"] is not None and t["holders"] >= RUGSCORE_HOLDERS_EXCEPTION),
+         "rejected", "❌ Rugscore too low ({rugscore}) – skipping token (holders: {holders})"),
+]
+
+
+class RuleEngine:
+    def __init__(self, rules, fetchers):
+        # fetchers : source -> fonction(liste d'adresses) -> {adresse: {champ: valeur}}
+        self.rules = rules
+        self.fetchers = fetchers
+
+    def stages(self):
+        stages = {}
+        for rule in self.rules:
+            stages.setdefault(rule.cost(), []).append(rule)
+        return [stages[cost] for cost in sorted(stages)]
+
+    def evaluate(self, tokens):
+        survivors = list(tokens)
+        rejected = []
+        counts = Counter()
+        fetched = set()
+        for rules in self.stages():
+            # On ne récupère une source que pour les tokens encore en lice
+            for source in sorted({source for rule in rules for source in rule.needs} - fetched, key=SOURCE_COST.get):
+                fetcher = self.fetchers.get(source)
+                if fetcher and survivors:
+                    results = fetcher([token["address"] for token in survivors])
+                    for token in survivors:
+                        token.update(results.get(token["address"], {}))
+                fetched.add(source)
+            remaining = []
+            for token in survivors:
+                rule = next((rule for rule in rules if rule.rejects(token)), None)
+                if rule is None:
+                    remaining.append(token)
+                    continue
+                if logging.getLogger().isEnabledFor(logging.INFO):
+                    logging.info(rule.message.format(**token))
+                counts[rule.name] += 1
+                FILTER_REJECTIONS.inc(rule=rule.name)
+                rejected.append((token, rule))
+            survivors = remaining
+        return survivors, rejected, counts
@@ -0,0 +1,124 @@
+import copy
+import time
+import logging
+from contextlib import contextmanager
+from threading import Lock, Thread
+
+from metrics import SCAN_STAGE, SCAN_RUNS
+
+
+class ScanCoordinator:
+    # Un seul scan à la fois ; les déclenchements concurrents sont fusionnés dans le run suivant
+    def __init__(self, scan_func, publish=None):
+        # publish(status) : copie de l'état à chaque changement, lue par les instances non leader
+        self.scan_func = scan_func
+        self.publish = publish
+        self._lock = Lock()
+        self._publish_lock = Lock()
+        self._running = False
+        self._pending = None
+        self.current = None
+        self.last = None
+        self.runs = 0
+
+    def _merge_pending(self, data, reason):
+        pending = self._pending or {"full": False, "tokens": {}, "reasons": []}
+        if data is None:
+            pending["full"] = True
+        else:
+            for token in data:
+                pending["tokens"][token.get("tokenAddress")] = token
+        pending["reasons"].append(reason)
+        self._pending = pending
+
+    def trigger(self, data=None, reason="manual"):
+        with self._lock:
+            self._merge_pending(data, reason)
+            queued = self._running
+            self._running = True
+            running_since = self.current and self.current["started_at"]
+        self._publish()
+        if queued:
+            return {"status": "queued", "running_since": running_since}
+        Thread(target=self._loop, name="scan", daemon=True).start()
+        return {"status": "started"}
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                if pending is None:
+                    self._running = False
+                    break
+                self.runs += 1
+                self.current = {
+                    "run": self.runs,
+                    "reasons": pending["reasons"],
+                    "started_at": time.time(),
+                    "stage": None,
+                    "stages": {},
+                    "progress": None,
+                }
+            self._publish()
+            data = None if pending["full"] else list(pending["tokens"].values())
+            run = self.current
+            try:
+                result = self.scan_func(data)
+                # Échec rapporté sans exception (ex. API Moralis indisponible) : compté comme une erreur
+                if isinstance(result, dict) and "error" in result:
+                    outcome = {"status": "error", "error": result["error"]}
+                else:
+                    outcome = {"result": result, "status": "ok"}
+            except Exception as e:
+                logging.error("❌ Scan error: %s", e)
+                outcome = {"status": "error", "error": str(e)}
+            SCAN_RUNS.inc(status=outcome["status"])
+            with self._lock:
+                run.update(outcome, stage=None, duration=round(time.time() - run["started_at"], 3))
+                self.last = run
+                self.current = None
+        self._publish()
+
+    @contextmanager
+    def stage(self, name):
+        # Champs du run lus par status() depuis d'autres threads : écrits sous le verrou
+        with self._lock:
+            run = self.current
+            if run is not None:
+                run["stage"] = name
+        self._publish()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            SCAN_STAGE.observe(elapsed, stage=name)
+            if run is not None:
+                with self._lock:
+                    run["stages"][name] = round(run["stages"].get(name, 0) + elapsed, 4)
+
+    def progress(self, done, total):
+        with self._lock:
+            if self.current is not None:
+                self.current["progress"] = {"done": done, "total": total}
+        self._publish()
+
+    def _publish(self):
+        if self.publish is None:
+            return
+        # Sérialisé : une copie plus ancienne n'écrase jamais une plus récente
+        with self._publish_lock:
+            try:
+                self.publish({**self.status(), "updated_at": time.time()})
+            except Exception as e:
+                logging.error("❌ Scan status publish error: %s", e)
+
+    def status(self):
+        with self._lock:
+            return copy.deepcopy({
+                "running": self._running,
+                "pending": bool(self._pending),
+                "current": self.current,
+                "last": self.last,
+                "runs": self.runs,
+            })
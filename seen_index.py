@@ -0,0 +1,40 @@
+import os
+
+# Durée de validité d'un verdict avant que le token soit réévalué (secondes)
+VERDICT_TTL = {
+    "rejected": int(os.getenv("SEEN_TTL_REJECTED", str(24 * 3600))),
+    "alerted": int(os.getenv("SEEN_TTL_ALERTED", str(7 * 24 * 3600))),
+    "filtered_mc": int(os.getenv("SEEN_TTL_FILTERED_MC", str(10 * 60))),
+    # Source indisponible (429, panne RugCheck) : on réessaie au cycle suivant, pas le lendemain
+    "error": int(os.getenv("SEEN_TTL_ERROR", "60")),
+}
+
+
+def _entry(index, token_address):
+    entry = index.get(token_address)
+    if entry is None:
+        return None
+    # Ancien format de token_memory_ultimate.json : {adresse: timestamp}
+    if isinstance(entry, (int, float)):
+        entry = {"verdict": "rejected", "ts": entry}
+        index[token_address] = entry
+    return entry
+
+
+def is_seen(index, token_address, now):
+    entry = _entry(index, token_address)
+    if entry is None:
+        return False
+    ttl = VERDICT_TTL.get(entry.get("verdict"), VERDICT_TTL["rejected"])
+    return now - entry.get("ts", 0) < ttl
+
+
+def mark_seen(index, token_address, verdict, now):
+    index[token_address] = {"verdict": verdict, "ts": now}
+
+
+def sweep_seen(index, now):
+    expired = [token_address for token_address in list(index) if not is_seen(index, token_address, now)]
+    for token_address in expired:
+        del index[token_address]
+    return len(expired)
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+DB_FILE = os.getenv("STATE_DB", "pumpfun_state.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Fichiers JSON historiques -> namespace SQLite
+JSON_MIGRATIONS = {
+    "token_memory_ultimate.json": "seen",
+    "token_tracking.json": "tracking",
+    "wallet_stats.json": "wallet_stats",
+    "analyses_history.json": "analyses",
+}
+
+
+class Store:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(records)")]
+        if "seq" not in columns:
+            conn.execute("ALTER TABLE records ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS records_seq ON records (namespace, seq)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def query(self, sql, params=()):
+        return self._conn().execute(sql, params).fetchall()
+
+    def ensure_schema(self, sql):
+        self._conn().executescript(sql)
+
+    def transaction(self):
+        return _Transaction(self._conn())
+
+    def get(self, namespace, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM records WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_many(self, namespace, keys):
+        keys = list(keys)
+        found = {}
+        # Limite SQLite sur le nombre de paramètres : on découpe
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn().execute(
+                f"SELECT key, value FROM records WHERE namespace = ? AND key IN ({placeholders})",
+                (namespace, *chunk),
+            )
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def items(self, namespace):
+        rows = self._conn().execute("SELECT key, value FROM records WHERE namespace = ?", (namespace,))
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def changed_since(self, namespace, seq, limit):
+        rows = self._conn().execute(
+            "SELECT key, value, seq FROM records WHERE namespace = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (namespace, seq, limit),
+        )
+        return [(key, json.loads(value), row_seq) for key, value, row_seq in rows]
+
+    def count(self, namespace):
+        return self._conn().execute("SELECT COUNT(*) FROM records WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def upsert(self, namespace, key, value):
+        self.upsert_many(namespace, {key: value})
+
+    def upsert_many(self, namespace, mapping, conn=None):
+        if not mapping:
+            return
+        if conn is None:
+            with self.transaction() as tx:
+                return self.upsert_many(namespace, mapping, conn=tx)
+        now = time.time()
+        # Numéro de séquence croissant par ligne modifiée : sert de curseur pour la synchro delta
+        row = conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        seq = json.loads(row[0]) if row else 0
+        rows = []
+        for key, value in mapping.items():
+            seq += 1
+            rows.append((namespace, key, json.dumps(value, ensure_ascii=False), now, seq))
+        conn.executemany(
+            "INSERT INTO records (namespace, key, value, updated_at, seq) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET "
+            "value = excluded.value, updated_at = excluded.updated_at, seq = excluded.seq",
+            rows,
+        )
+        self.set_meta("seq", seq, conn=conn)
+
+    def delete_many(self, namespace, keys, conn=None):
+        rows = [(namespace, key) for key in keys]
+        if not rows:
+            return
+        sql = "DELETE FROM records WHERE namespace = ? AND key = ?"
+        if conn is not None:
+            conn.executemany(sql, rows)
+            return
+        with self.transaction() as tx:
+            tx.executemany(sql, rows)
+
+    def get_meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value, conn=None):
+        sql = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+        params = (key, json.dumps(value))
+        if conn is not None:
+            conn.execute(sql, params)
+            return
+        with self.transaction() as tx:
+            tx.execute(sql, params)
+
+    def migrate_json(self, path, namespace):
+        marker = f"migrated:{namespace}"
+        if self.get_meta(marker) or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            data = json.loads(content) if content else {}
+        except Exception as e:
+            logging.error("❌ Migration impossible pour %s: %s", path, e)
+            return 0
+        if not isinstance(data, dict):
+            logging.error("❌ Migration ignorée pour %s: format inattendu", path)
+            return 0
+        with self.transaction() as tx:
+            self.upsert_many(namespace, data, conn=tx)
+            self.set_meta(marker, {"source": path, "count": len(data), "at": time.time()}, conn=tx)
+        logging.info("📦 %d entrées migrées de %s vers '%s'", len(data), path, namespace)
+        return len(data)
+
+    def migrate_all(self):
+        return {namespace: self.migrate_json(path, namespace) for path, namespace in JSON_MIGRATIONS.items()}
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Store()
+        return _store
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        print(get_store().migrate_all())
+    else:
+        print("Usage: python storage.py migrate")
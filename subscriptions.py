@@ -0,0 +1,115 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+from threading import Lock
+
+from rules import MIN_MARKET_CAP, MIN_LIQUIDITY, MIN_HOLDERS
+
+SUBSCRIPTIONS_NAMESPACE = "subscriptions"
+DIMENSIONS = ("mc", "lq", "holders", "rugscore")
+
+# Seuils par défaut = filtres globaux ; un abonné ne peut que les durcir
+DEFAULT_THRESHOLDS = {
+    "mc": [MIN_MARKET_CAP, None],
+    "lq": [MIN_LIQUIDITY, None],
+    "holders": [MIN_HOLDERS, None],
+    "rugscore": [0, None],
+}
+
+
+def _bounds(interval):
+    low, high = interval
+    return (-math.inf if low is None else low), (math.inf if high is None else high)
+
+
+class SubscriptionRegistry:
+    # Index d'intervalles : pour chaque dimension, bornes basses et hautes triées
+    def __init__(self, store):
+        self.store = store
+        self.subscriptions = {}
+        self._lows = {dimension: [] for dimension in DIMENSIONS}
+        self._highs = {dimension: [] for dimension in DIMENSIONS}
+        self._lock = Lock()
+        for chat_id, thresholds in store.items(SUBSCRIPTIONS_NAMESPACE):
+            self._index(chat_id, thresholds)
+
+    def _index(self, chat_id, thresholds):
+        self.subscriptions[chat_id] = thresholds
+        for dimension in DIMENSIONS:
+            low, high = _bounds(thresholds[dimension])
+            insort(self._lows[dimension], (low, chat_id))
+            insort(self._highs[dimension], (high, chat_id))
+
+    def _unindex(self, chat_id):
+        thresholds = self.subscriptions.pop(chat_id, None)
+        if thresholds is None:
+            return
+        for dimension in DIMENSIONS:
+            low, high = _bounds(thresholds[dimension])
+            lows, highs = self._lows[dimension], self._highs[dimension]
+            del lows[bisect_left(lows, (low, chat_id))]
+            del highs[bisect_left(highs, (high, chat_id))]
+
+    def get(self, chat_id):
+        return self.subscriptions.get(str(chat_id))
+
+    def subscribe(self, chat_id, thresholds=None):
+        chat_id = str(chat_id)
+        with self._lock:
+            current = self.subscriptions.get(chat_id)
+            merged = {dimension: list(interval) for dimension, interval in DEFAULT_THRESHOLDS.items()}
+            if current:
+                merged.update(current)
+            if thresholds:
+                merged.update(thresholds)
+            self._unindex(chat_id)
+            self._index(chat_id, merged)
+        self.store.upsert(SUBSCRIPTIONS_NAMESPACE, chat_id, merged)
+        return merged
+
+    def set_threshold(self, chat_id, dimension, low, high=None):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {dimension}")
+        return self.subscribe(chat_id, {dimension: [low, high]})
+
+    def unsubscribe(self, chat_id):
+        chat_id = str(chat_id)
+        with self._lock:
+            self._unindex(chat_id)
+        self.store.delete_many(SUBSCRIPTIONS_NAMESPACE, [chat_id])
+
+    def match(self, values):
+        with self._lock:
+            if not self.subscriptions:
+                return []
+            # On part de la contrainte la plus sélective (comptée par bisect), puis on vérifie les autres
+            best = None
+            for dimension in DIMENSIONS:
+                value = values.get(dimension)
+                if value is None:
+                    continue
+                lows, highs = self._lows[dimension], self._highs[dimension]
+                low_count = bisect_right(lows, (value, "\uffff"))
+                high_start = bisect_left(highs, (value, ""))
+                if best is None or low_count < best[0]:
+                    best = (low_count, lows[:low_count])
+                if best is None or len(highs) - high_start < best[0]:
+                    best = (len(highs) - high_start, highs[high_start:])
+            candidates = [chat_id for _, chat_id in best[1]] if best else list(self.subscriptions)
+            matched = []
+            for chat_id in candidates:
+                thresholds = self.subscriptions[chat_id]
+                if all(
+                    values.get(dimension) is None
+                    or _bounds(thresholds[dimension])[0] <= values[dimension] <= _bounds(thresholds[dimension])[1]
+                    for dimension in DIMENSIONS
+                ):
+                    matched.append(chat_id)
+            return matched
+
+
+def format_thresholds(thresholds):
+    lines = []
+    for dimension in DIMENSIONS:
+        low, high = thresholds[dimension]
+        lines.append(f"- {dimension}: {low if low is not None else '-'} → {high if high is not None else '∞'}")
+    return "\n".join(lines)
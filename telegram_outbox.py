@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import logging
+import http_client
+from rate_limit import TokenBucket
+from threading import Event, Lock, Thread
+
+# Limites Telegram : ~30 msg/s au global, 1 msg/s par chat, 20 msg/min par groupe
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+GROUP_RATE = float(os.getenv("TELEGRAM_GROUP_RATE", str(20 / 60)))
+MAX_ATTEMPTS = 5
+BATCH_SIZE = 100
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS telegram_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class TelegramOutbox:
+    def __init__(self, store, telegram_token):
+        self.store = store
+        self.url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
+        self.global_bucket = TokenBucket(GLOBAL_RATE)
+        self.chat_buckets = {}
+        self._wakeup = Event()
+        self._lock = Lock()
+        self._thread = None
+        store.ensure_schema(OUTBOX_SCHEMA)
+
+    def enqueue(self, chat_id, text, reply_markup=None, parse_mode="Markdown"):
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode}
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+        with self.store.transaction() as tx:
+            tx.execute(
+                "INSERT INTO telegram_outbox (chat_id, payload, created_at) VALUES (?, ?, ?)",
+                (str(chat_id), json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+        self._wakeup.set()
+
+    def depth(self):
+        return self.store.query("SELECT COUNT(*) FROM telegram_outbox")[0][0]
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="telegram-outbox", daemon=True)
+                self._thread.start()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = GROUP_RATE if chat_id.startswith("-") else CHAT_RATE
+            bucket = self.chat_buckets[chat_id] = TokenBucket(rate, capacity=1)
+        return bucket
+
+    def _pending(self):
+        return self.store.query(
+            "SELECT id, chat_id, payload, attempts FROM telegram_outbox WHERE not_before <= ? ORDER BY id LIMIT ?",
+            (time.time(), BATCH_SIZE),
+        )
+
+    def _run(self):
+        while True:
+            try:
+                idle = self._drain()
+            except Exception as e:
+                logging.error("❌ Telegram outbox error: %s", e)
+                idle = 5
+            self._wakeup.wait(timeout=idle)
+            self._wakeup.clear()
+
+    def _drain(self):
+        rows = self._pending()
+        if not rows:
+            return 5
+        next_wait = 5
+        blocked_chats = set()
+        for row_id, chat_id, payload, attempts in rows:
+            # Ordre FIFO par chat : si un chat est limité, ses messages suivants attendent aussi
+            if chat_id in blocked_chats:
+                continue
+            chat_bucket = self._chat_bucket(chat_id)
+            wait = chat_bucket.wait_time()
+            if wait > 0:
+                blocked_chats.add(chat_id)
+                next_wait = min(next_wait, wait)
+                continue
+            global_wait = self.global_bucket.wait_time()
+            if global_wait > 0:
+                time.sleep(global_wait)
+            self.global_bucket.consume()
+            chat_bucket.consume()
+            self._send(row_id, chat_id, json.loads(payload), attempts)
+        return 0 if len(rows) == BATCH_SIZE and len(blocked_chats) == 0 else next_wait
+
+    def _send(self, row_id, chat_id, payload, attempts):
+        try:
+            response = http_client.post(self.url, json=payload)
+        except Exception as e:
+            logging.error("❌ Telegram error: %s", e)
+            self._retry(row_id, attempts, 2 ** attempts)
+            return
+        if response.status_code == 429:
+            try:
+                retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+            except Exception:
+                retry_after = 1
+            logging.warning("⏳ Telegram 429 pour %s, retry_after=%ss", chat_id, retry_after)
+            self._chat_bucket(chat_id).pause(retry_after)
+            self._retry(row_id, attempts, retry_after, count_attempt=False)
+            return
+        if response.status_code >= 500:
+            self._retry(row_id, attempts, 2 ** attempts)
+            return
+        if response.status_code != 200:
+            logging.error("❌ Telegram a refusé le message (%s): %s", response.status_code, response.text)
+        with self.store.transaction() as tx:
+            tx.execute("DELETE FROM telegram_outbox WHERE id = ?", (row_id,))
+
+    def _retry(self, row_id, attempts, delay, count_attempt=True):
+        attempts = attempts + 1 if count_attempt else attempts
+        with self.store.transaction() as tx:
+            if attempts >= MAX_ATTEMPTS:
+                logging.error("❌ Message Telegram %s abandonné après %s tentatives", row_id, attempts)
+                tx.execute("DELETE FROM telegram_outbox WHERE id = ?", (row_id,))
+            else:
+                tx.execute(
+                    "UPDATE telegram_outbox SET attempts = ?, not_before = ? WHERE id = ?",
+                    (attempts, time.time() + delay, row_id),
+                )
@@ -0,0 +1,54 @@
+import os
+import gzip
+import json
+import logging
+import http_client
+
+TENDY_API = os.getenv("TENDY_API", "https://tendy-api.onrender.com")
+SYNC_BATCH_SIZE = int(os.getenv("TENDY_SYNC_BATCH_SIZE", "200"))
+
+# namespace du store -> endpoint de l'API Tendy
+SYNC_ENDPOINTS = {
+    "tracking": "/tokens",
+    "analyses": "/analyses_history",
+}
+
+
+def _payload(namespace, rows):
+    if namespace == "tracking":
+        return [value | {"token_address": key} for key, value, _ in rows]
+    return {key: value for key, value, _ in rows}
+
+
+def sync_namespace(store, namespace):
+    cursor_key = f"tendy_cursor:{namespace}"
+    cursor = store.get_meta(cursor_key, 0)
+    sent = 0
+    while True:
+        rows = store.changed_since(namespace, cursor, SYNC_BATCH_SIZE)
+        if not rows:
+            break
+        body = gzip.compress(json.dumps(_payload(namespace, rows), ensure_ascii=False).encode("utf-8"))
+        try:
+            response = http_client.post(
+                f"{TENDY_API}{SYNC_ENDPOINTS[namespace]}",
+                data=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            )
+        except Exception as e:
+            logging.error("❌ Erreur d'envoi à l'API Tendy (%s): %s", namespace, e)
+            break
+        if response.status_code >= 300:
+            logging.error("❌ API Tendy (%s) a refusé le lot: %s", namespace, response.status_code)
+            break
+        # Le curseur n'avance qu'après acquittement : un lot échoué est renvoyé à la prochaine synchro
+        cursor = rows[-1][2]
+        store.set_meta(cursor_key, cursor)
+        sent += len(rows)
+    return sent
+
+
+def sync_to_tendy(store):
+    sent = {namespace: sync_namespace(store, namespace) for namespace in SYNC_ENDPOINTS}
+    logging.info("✅ Synchro delta API Tendy: %s", sent)
+    return sent
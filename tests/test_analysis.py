@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from analysis import AnalysisService
+from cache import response_cache
+from storage import Store
+
+
+@pytest.fixture
+def service(tmp_path):
+    response_cache.clear()
+    market = {"market_cap": 50000, "holders": 300, "volume": 10000, "bonding_percent": 100}
+    posted = []
+    asked = []
+
+    def ask(prompt):
+        asked.append(prompt)
+        return f"analyse {len(asked)}"
+
+    service = AnalysisService(
+        Store(str(tmp_path / "state.db")),
+        gather=lambda token: {"token_address": token, "symbol": "TK", "rugscore": 80, **market},
+        build_prompt=lambda metrics: str(metrics),
+        ask=ask,
+        notify=lambda token, analysis: posted.append(analysis["analysis"]),
+        peek=lambda token: dict(market),
+    )
+    # Un seul worker : click() peut attendre la fin de la notification
+    service._executor = ThreadPoolExecutor(max_workers=1)
+    service.market, service.posted, service.asked = market, posted, asked
+    yield service
+    response_cache.clear()
+
+
+def click(service, token="tok"):
+    job = service.submit(token)
+    deadline = time.time() + 5
+    while job["status"] == "pending" and time.time() < deadline:
+        time.sleep(0.01)
+    service._executor.submit(lambda: None).result()
+    return job
+
+
+def test_fresh_analysis_is_posted_once(service):
+    first = click(service)
+    second = click(service)
+    assert first["cached"] is False and second["cached"] is True
+    assert service.asked == [service.asked[0]]
+    assert service.posted == ["analyse 1"]
+
+
+def test_prewarmed_analysis_is_posted_on_first_click_only(service):
+    service.analyze_many(["tok"])
+    assert service.posted == []
+    click(service)
+    click(service)
+    assert service.posted == ["analyse 1"]
+    assert len(service.asked) == 1
+
+
+def test_market_move_invalidates_cached_analysis(service):
+    click(service)
+    service.market["market_cap"] *= 10
+    assert service.recent_analysis("tok") is None
+    job = click(service)
+    assert job["cached"] is False
+    assert service.posted == ["analyse 1", "analyse 2"]
+
+
+def test_refresh_noise_keeps_cached_analysis(service):
+    click(service)
+    service.market["market_cap"] *= 1.1
+    service.market["holders"] += 5
+    assert service.recent_analysis("tok") is not None
+    assert click(service)["cached"] is True
+    assert service.posted == ["analyse 1"]
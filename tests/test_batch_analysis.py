@@ -0,0 +1,73 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+import batch_analysis
+from batch_analysis import (SYSTEM_PROMPT, BatchAnalyzer, OpenAILimiter, compact_metrics, estimate_tokens,
+                            format_verdict, pack, parse_verdicts)
+from replay import StubServer
+
+
+def test_limiter_spaces_requests_from_all_callers():
+    limiter = OpenAILimiter(requests_per_minute=600)
+    stamps = []
+
+    def call():
+        limiter.acquire()
+        stamps.append(time.monotonic())
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for _ in range(4):
+            pool.submit(call)
+    stamps.sort()
+    assert all(later - earlier >= 0.09 for earlier, later in zip(stamps, stamps[1:]))
+    assert limiter.waiting == 0
+
+
+def _metrics(i, note=""):
+    return {"name": f"Token {i}", "symbol": f"TK{i}", "market_cap": 50000 + i, "holders": 100 + i,
+            "rugscore": 60, "lp_status": "Locked", "scamr_note": note}
+
+
+def test_pack_respects_budget_and_item_cap():
+    items = [(f"tok{i}", _metrics(i)) for i in range(25)]
+    batches = pack(items, budget=3000, max_items=10)
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [address for batch in batches for address, _ in batch] == [address for address, _ in items]
+    tight = estimate_tokens(SYSTEM_PROMPT) + 2 * estimate_tokens(json.dumps(compact_metrics("tok0", _metrics(0))))
+    assert all(len(batch) <= 2 for batch in pack(items, budget=tight, max_items=10))
+
+
+def test_oversized_item_gets_its_own_batch():
+    items = [("big", _metrics(0, note="x" * 20000)), ("small", _metrics(1))]
+    assert pack(items, budget=3000) == [[items[0]], [items[1]]]
+
+
+def test_parse_verdicts_keeps_only_requested_tokens():
+    content = json.dumps({"verdicts": [{"token": "a", "setup": "ok"}, {"token": "zzz"}, "junk"]})
+    assert parse_verdicts(content, ["a", "b"]) == {"a": {"token": "a", "setup": "ok"}}
+    assert parse_verdicts("pas du json", ["a"]) == {}
+
+
+def test_batch_round_trip_against_replay_stub(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_analysis, "BATCH_WINDOW", 0.1)
+    fixtures = tmp_path / "upstream.jsonl"
+    fixtures.write_text("")
+    stub = StubServer(str(fixtures)).start()
+    try:
+        client = OpenAI(api_key="test", base_url=f"{stub.url}/v1", max_retries=0)
+        analyzer = BatchAnalyzer(client, limiter=OpenAILimiter(requests_per_minute=6000))
+        batch = pack([(f"tok{i}", _metrics(i)) for i in range(3)])[0]
+        verdicts = analyzer.analyze_batch(batch)
+        futures = [analyzer.submit("tok7", _metrics(7)), analyzer.submit("tok7", _metrics(7))]
+        queued = [future.result(timeout=10) for future in futures]
+    finally:
+        stub.stop()
+    assert set(verdicts) == {"tok0", "tok1", "tok2"}
+    assert verdicts["tok1"]["setup"] == "Verdict rejoué (stub)."
+    assert "Setup" in format_verdict(verdicts["tok1"])
+    assert queued[0] == queued[1] and queued[0]["token"] == "tok7"
+    assert analyzer.requests == 2
+    assert stub.requests == 2
@@ -0,0 +1,20 @@
+import bench
+import http_client
+from replay import StubServer, synthesize, _fake_address
+
+
+def test_bench_routes_upstream_calls_to_stub(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client, "UPSTREAM_OVERRIDE", None)
+    monkeypatch.delenv("HTTP_UPSTREAM_OVERRIDE", raising=False)
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    fixtures = tmp_path / "upstream.jsonl"
+    synthesize(str(fixtures), tokens=2)
+    stub = StubServer(str(fixtures)).start()
+    try:
+        bench.use_stub(stub)
+        response = http_client.get(f"https://api.rugcheck.xyz/v1/tokens/{_fake_address(0)}/report")
+    finally:
+        stub.stop()
+    assert response.status_code == 200
+    assert "score_normalised" in response.json()
+    assert stub.requests == 1
@@ -0,0 +1,47 @@
+import time
+import multiprocessing
+
+from coordination import LeaderLease
+from storage import Store
+
+TTL = 2.0
+
+
+def _contend(db_path, holder, wait):
+    # Processus distinct : 0 si le bail est obtenu, 1 sinon ; sort sans libérer le bail
+    lease = LeaderLease(Store(db_path), holder=holder, ttl=TTL)
+    acquired = lease.wait_until_leader(timeout=wait) if wait else lease.try_acquire()
+    raise SystemExit(0 if acquired else 1)
+
+
+def run(db_path, holder, wait=0):
+    process = multiprocessing.get_context("fork").Process(target=_contend, args=(db_path, holder, wait))
+    process.start()
+    process.join(10)
+    return process.exitcode
+
+
+def test_lease_fails_over_to_another_process(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    observer = LeaderLease(Store(db_path), holder="observer", ttl=TTL)
+    assert run(db_path, "a") == 0
+    assert observer.current()["holder"] == "a"
+    # Bail encore valide : un autre processus ne peut pas le prendre
+    assert run(db_path, "b") == 1
+    assert run(db_path, "a") == 0
+    # Le leader disparaît sans libérer : le candidat prend la main après expiration
+    started = time.time()
+    assert run(db_path, "b", wait=5 * TTL) == 0
+    assert time.time() - started < 5 * TTL
+    current = observer.current()
+    assert current["holder"] == "b"
+    assert current["acquired_at"] >= started
+
+
+def test_release_hands_over_immediately(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    leader = LeaderLease(Store(db_path), holder="a", ttl=60)
+    assert leader.try_acquire()
+    assert run(db_path, "b") == 1
+    leader.release()
+    assert run(db_path, "b") == 0
@@ -0,0 +1,18 @@
+import enrichment
+import http_client
+
+
+def _limits(token_address):
+    return (enrichment._semaphores["rugcheck"]._initial_value,
+            http_client._host_for("https://api.rugcheck.xyz/v1")[1].semaphore._initial_value)
+
+
+def test_shards_split_upstream_limits(monkeypatch):
+    monkeypatch.setattr(enrichment, "ENRICH_PROCESSES", 2)
+    monkeypatch.setattr(enrichment, "_shards", [])
+    results = enrichment.enrich_sharded(["a", "b", "c"], {"limits": _limits})
+    for pool in enrichment._shards:
+        pool.shutdown()
+    total = enrichment.UPSTREAM_LIMITS["rugcheck"], http_client.HOST_CONFIG["api.rugcheck.xyz"]["max_concurrency"]
+    assert {value["limits"] for value in results.values()} == {(total[0] // 2, total[1] // 2)}
+    assert _limits("parent") == total
@@ -0,0 +1,15 @@
+from event_log import EventLog, EVENT_ENTER, EVENT_EXIT, RECORD
+
+ADDRESS = "So11111111111111111111111111111111111111112"
+
+
+def test_append_after_torn_record_stays_aligned(tmp_path):
+    log = EventLog(str(tmp_path / "events.log"))
+    log.append([(EVENT_ENTER, 1.0, 1.0, ADDRESS)])
+    with open(log.path, "ab") as f:
+        f.write(b"\x01\xff\x02")
+    assert log.size() == RECORD.size
+    end = log.append([(EVENT_EXIT, 2.0, 1.0, "B" * 44)])
+    events, offset = log.read_from(0)
+    assert end == offset == 2 * RECORD.size
+    assert events == [(EVENT_ENTER, 1.0, 1.0, ADDRESS), (EVENT_EXIT, 2.0, 1.0, "B" * 44)]
@@ -0,0 +1,18 @@
+from leaderboard import WinnersIndex
+
+
+def test_repeated_update_lists_token_once():
+    index = WinnersIndex()
+    index.update("b", "B", 1, 3)
+    index.update("a", "A", 1, 2)
+    index.update("a", "A", 1, 2)
+    assert index.top(3) == [("B", 3.0, "b"), ("A", 2.0, "a")]
+
+
+def test_top_is_stable_across_calls():
+    index = WinnersIndex()
+    index.update("a", "A", 1, 2)
+    index.update("a", "A", 1, 4)
+    index.update("a", "A", 1, 2)
+    assert index.top(3) == [("A", 2.0, "a")]
+    assert index.top(3) == [("A", 2.0, "a")]
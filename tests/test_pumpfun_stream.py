@@ -0,0 +1,63 @@
+import json
+import time
+import base64
+import socket
+import struct
+import asyncio
+from threading import Thread
+
+from solders.pubkey import Pubkey
+
+from pumpfun_stream import COMPLETE_EVENT, CREATE_EVENT, PROGRAM_DATA_PREFIX, PumpfunStream, serve_replay
+
+MINT = Pubkey.from_bytes(bytes(range(1, 33)))
+CURVE = Pubkey.from_bytes(bytes(range(33, 65)))
+USER = Pubkey.from_bytes(bytes(range(65, 97)))
+
+
+def _string(value):
+    data = value.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def _notification(signature, payloads, err=None):
+    logs = ["Program log: Instruction: Buy"]
+    logs += [PROGRAM_DATA_PREFIX + base64.b64encode(payload).decode() for payload in payloads]
+    return {"jsonrpc": "2.0", "method": "logsNotification",
+            "params": {"result": {"value": {"signature": signature, "err": err, "logs": logs}}}}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_stream_decodes_events_from_replay_websocket(tmp_path):
+    create = CREATE_EVENT + _string("Token") + _string("TK") + _string("ipfs://x") + bytes(MINT) + bytes(CURVE) + bytes(USER)
+    complete = COMPLETE_EVENT + bytes(USER) + bytes(MINT) + bytes(CURVE) + struct.pack("<q", 1_700_000_000)
+    notifications = tmp_path / "notifications.jsonl"
+    with open(notifications, "w", encoding="utf-8") as f:
+        for message in (
+            _notification("sig-create", [create]),
+            _notification("sig-failed", [complete], err={"InstructionError": [0, "Custom"]}),
+            _notification("sig-complete", [complete, b"\x00" * 8]),
+        ):
+            f.write(json.dumps(message) + "\n")
+    port = _free_port()
+    Thread(target=lambda: asyncio.run(serve_replay(str(notifications), port=port)), daemon=True).start()
+
+    events = []
+    stream = PumpfunStream(events.append, url=f"ws://127.0.0.1:{port}")
+    stream.start()
+    deadline = time.time() + 10
+    while len(events) < 2 and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert events == [
+        {"type": "create", "name": "Token", "symbol": "TK", "uri": "ipfs://x", "mint": str(MINT),
+         "bonding_curve": str(CURVE), "user": str(USER), "signature": "sig-create"},
+        {"type": "complete", "user": str(USER), "mint": str(MINT), "bonding_curve": str(CURVE),
+         "timestamp": 1_700_000_000, "signature": "sig-complete"},
+    ]
+    assert stream.connected
@@ -0,0 +1,101 @@
+import itertools
+
+import rules
+from rules import FILTER_RULES, RuleEngine
+
+
+def legacy_verdict(token):
+    # Chaîne de if de check_tokens avant le moteur de règles
+    top_holders, holders, rugscore = token["top_holders"], token["holders"], token["rugscore"]
+    if top_holders and top_holders[0] >= 30:
+        return "rejected"
+    if token["mc"] < 45000 or token["lq"] < 8000 or (holders is not None and holders < 80):
+        return "filtered_mc"
+    if token["honeypot"] or not token["lp_locked"]:
+        return "rejected"
+    if rugscore is not None and rugscore < 40 and not (holders is not None and holders >= 500):
+        return "rejected"
+    return "alerted"
+
+
+def evaluate(tokens, rugcheck=None):
+    fetched = []
+
+    def fetch_rugcheck(addresses):
+        fetched.extend(addresses)
+        return rugcheck(addresses) if rugcheck else {}
+
+    engine = RuleEngine(FILTER_RULES, {"rugcheck": fetch_rugcheck})
+    survivors, rejected, counts = engine.evaluate(tokens)
+    verdicts = {token["address"]: "alerted" for token in survivors}
+    verdicts.update({token["address"]: rule.verdict for token, rule in rejected})
+    rules_hit = {token["address"]: rule.name for token, rule in rejected}
+    return verdicts, rules_hit, fetched, counts
+
+
+def token_grid():
+    dimensions = itertools.product(
+        (20000, 60000),            # mc
+        (5000, 12000),             # lq
+        ([], [12.0], [35.0]),      # top_holders
+        (None, 50, 120, 600),      # holders
+        (False, True),             # honeypot
+        (False, True),             # lp_locked
+        (None, 20, 80),            # rugscore
+    )
+    for index, (mc, lq, top_holders, holders, honeypot, lp_locked, rugscore) in enumerate(dimensions):
+        yield {"address": f"tok{index}", "mc": mc, "lq": lq, "top_holders": top_holders, "holders": holders,
+               "honeypot": honeypot, "lp_locked": lp_locked, "rugscore": rugscore}
+
+
+def test_verdicts_match_legacy_chain():
+    tokens = list(token_grid())
+    expected = {token["address"]: legacy_verdict(token) for token in tokens}
+    moralis = {token["address"]: {"mc": token["mc"], "lq": token["lq"]} for token in tokens}
+    rugcheck = {token["address"]: {key: value for key, value in token.items() if key not in moralis[token["address"]]}
+                for token in tokens}
+    verdicts, _, _, _ = evaluate(
+        [{"address": address, **fields} for address, fields in moralis.items()],
+        lambda addresses: {address: rugcheck[address] for address in addresses},
+    )
+    for token in tokens:
+        address = token["address"]
+        cheap_filter = token["mc"] < rules.MIN_MARKET_CAP or token["lq"] < rules.MIN_LIQUIDITY
+        if cheap_filter:
+            # Seul écart voulu : MC et liquidité sont jugées avant RugCheck, le token est revu plus tard
+            assert verdicts[address] == "filtered_mc"
+        else:
+            assert verdicts[address] == expected[address], token
+
+
+def test_cheap_rules_run_before_rugcheck_is_fetched():
+    tokens = [
+        {"address": "low_mc", "mc": 1000, "lq": 20000},
+        {"address": "low_lq", "mc": 90000, "lq": 100},
+        {"address": "ok", "mc": 90000, "lq": 20000},
+    ]
+    full = {"top_holders": [5.0], "holders": 200, "honeypot": False, "lp_locked": True, "rugscore": 80}
+    verdicts, rules_hit, fetched, counts = evaluate(tokens, lambda addresses: {address: full for address in addresses})
+    assert fetched == ["ok"]
+    assert rules_hit == {"low_mc": "market_cap", "low_lq": "liquidity"}
+    assert verdicts["ok"] == "alerted"
+    assert counts == {"market_cap": 1, "liquidity": 1}
+
+
+def test_low_rugscore_passes_with_500_holders():
+    base = {"mc": 90000, "lq": 20000, "top_holders": [5.0], "honeypot": False, "lp_locked": True, "rugscore": 20}
+    tokens = [{"address": "crowded", **base, "holders": 500}, {"address": "thin", **base, "holders": 499}]
+    verdicts, rules_hit, _, _ = evaluate(tokens)
+    assert verdicts == {"crowded": "alerted", "thin": "rejected"}
+    assert rules_hit == {"thin": "rugscore"}
+
+
+def test_rugcheck_unavailable_is_an_error_not_a_rejection():
+    # Réponse vide de fetch_rugcheck_batch quand RugCheck est en panne ou rate-limité
+    empty = {"rugscore": None, "honeypot": None, "lp_locked": False, "holders": None, "top_holders": [],
+             "rugcheck_ok": False}
+    verdicts, rules_hit, _, _ = evaluate(
+        [{"address": "tok", "mc": 90000, "lq": 20000}], lambda addresses: {address: empty for address in addresses}
+    )
+    assert verdicts == {"tok": "error"}
+    assert rules_hit == {"tok": "rugcheck_unavailable"}
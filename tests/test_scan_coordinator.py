@@ -0,0 +1,83 @@
+import time
+from threading import Event
+
+from scan_coordinator import ScanCoordinator
+from storage import Store
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_status_is_published_for_other_instances(tmp_path):
+    leader_store = Store(str(tmp_path / "state.db"))
+    follower_store = Store(str(tmp_path / "state.db"))
+    scans = None
+
+    def scan(data):
+        with scans.stage("fetch"):
+            assert follower_store.get_meta("scan_status")["current"]["stage"] == "fetch"
+        return {"scanned": 3}
+
+    scans = ScanCoordinator(scan, publish=lambda status: leader_store.set_meta("scan_status", status))
+    scans.trigger(reason="test")
+    wait_until(lambda: not follower_store.get_meta("scan_status")["running"])
+    published = follower_store.get_meta("scan_status")
+    assert published["running"] is False
+    assert published["last"]["status"] == "ok"
+    assert published["last"]["result"] == {"scanned": 3}
+    assert published["last"]["reasons"] == ["test"]
+
+
+def test_error_result_is_recorded_as_failed_run():
+    scans = ScanCoordinator(lambda data: {"error": "Moralis API error: timeout"})
+    scans.trigger(reason="test")
+    wait_until(lambda: scans.status()["last"] is not None)
+    last = scans.status()["last"]
+    assert last["status"] == "error"
+    assert last["error"] == "Moralis API error: timeout"
+
+
+def test_triggers_during_a_scan_are_coalesced_into_one_run():
+    release = Event()
+    calls = []
+
+    def scan(data):
+        calls.append(data)
+        if len(calls) == 1:
+            release.wait(5)
+        return {"scanned": len(data or [])}
+
+    scans = ScanCoordinator(scan)
+    assert scans.trigger([{"tokenAddress": "a"}], reason="stream") == {"status": "started"}
+    wait_until(lambda: calls)
+    assert scans.trigger([{"tokenAddress": "b"}], reason="stream")["status"] == "queued"
+    assert scans.trigger([{"tokenAddress": "c"}, {"tokenAddress": "b"}], reason="feed")["status"] == "queued"
+    release.set()
+    wait_until(lambda: not scans.status()["running"])
+    assert calls == [[{"tokenAddress": "a"}], [{"tokenAddress": "b"}, {"tokenAddress": "c"}]]
+    status = scans.status()
+    assert status["runs"] == 2
+    assert status["last"]["reasons"] == ["stream", "feed"]
+
+
+def test_full_scan_absorbs_partial_triggers():
+    release = Event()
+    calls = []
+
+    def scan(data):
+        calls.append(data)
+        if len(calls) == 1:
+            release.wait(5)
+        return {}
+
+    scans = ScanCoordinator(scan)
+    scans.trigger(reason="schedule")
+    wait_until(lambda: calls)
+    scans.trigger([{"tokenAddress": "a"}], reason="stream")
+    scans.trigger(reason="manual")
+    release.set()
+    wait_until(lambda: not scans.status()["running"])
+    assert calls == [None, None]
@@ -0,0 +1,38 @@
+from seen_index import VERDICT_TTL, is_seen, mark_seen, sweep_seen
+
+NOW = 1_000_000.0
+
+
+def test_each_verdict_expires_after_its_ttl():
+    for verdict, ttl in VERDICT_TTL.items():
+        index = {}
+        mark_seen(index, "tok", verdict, NOW)
+        assert is_seen(index, "tok", NOW + ttl - 1), verdict
+        assert not is_seen(index, "tok", NOW + ttl), verdict
+
+
+def test_transient_verdicts_expire_first():
+    assert VERDICT_TTL["error"] < VERDICT_TTL["filtered_mc"] < VERDICT_TTL["rejected"] < VERDICT_TTL["alerted"]
+
+
+def test_legacy_timestamp_entry_is_a_rejection():
+    index = {"tok": NOW}
+    assert is_seen(index, "tok", NOW + VERDICT_TTL["rejected"] - 1)
+    assert index["tok"] == {"verdict": "rejected", "ts": NOW}
+    assert not is_seen(index, "tok", NOW + VERDICT_TTL["rejected"])
+
+
+def test_unknown_token_is_not_seen():
+    assert not is_seen({}, "tok", NOW)
+
+
+def test_sweep_removes_only_expired_entries():
+    index = {}
+    mark_seen(index, "error", "error", NOW)
+    mark_seen(index, "filtered", "filtered_mc", NOW)
+    mark_seen(index, "rejected", "rejected", NOW)
+    mark_seen(index, "alerted", "alerted", NOW)
+    index["legacy"] = NOW - VERDICT_TTL["rejected"]
+    removed = sweep_seen(index, NOW + VERDICT_TTL["filtered_mc"])
+    assert removed == 3
+    assert set(index) == {"rejected", "alerted"}
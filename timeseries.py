@@ -0,0 +1,222 @@
+import os
+import time
+import argparse
+import logging
+from threading import Lock
+
+import numpy as np
+
+import rules
+
+HISTORY_FILE = os.getenv("HISTORY_FILE", "token_history.bin")
+
+# Un enregistrement par token jugé (détection) puis par rafraîchissement ; -1 / NaN = valeur inconnue
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("detected_at", "<f8"),
+    ("token", "<u4"),
+    ("holders", "<i4"),
+    ("mc", "<f8"),
+    ("initial_mc", "<f8"),
+    ("volume", "<f8"),
+    ("lq", "<f8"),
+    ("top_holder", "<f4"),
+    ("rugscore", "<i2"),
+    ("lp_locked", "<i1"),
+    ("honeypot", "<i1"),
+    ("verdict", "<u1"),
+    ("rule", "<u1"),
+    ("_pad", "V6"),
+])
+# Verdict de check_tokens au moment de l'enregistrement (0 : point de rafraîchissement)
+VERDICTS = {"alerted": 1, "rejected": 2, "filtered_mc": 3}
+VERDICT_ALERTED = VERDICTS["alerted"]
+# Règle ayant rejeté le token : indice dans FILTER_RULES + 1 (0 : aucune)
+RULE_CODES = {rule.name: index + 1 for index, rule in enumerate(rules.FILTER_RULES)}
+# Table des adresses : l'indice d'une adresse est l'identifiant stocké dans "token"
+ADDRESS_DTYPE = np.dtype("S44")
+
+
+def _number(value, default):
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenHistory:
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.addresses_path = f"{path}.tokens"
+        self._lock = Lock()
+        self._ids = {}
+        self._addresses = []
+        if os.path.exists(self.addresses_path):
+            size = os.path.getsize(self.addresses_path)
+            stored = np.fromfile(self.addresses_path, dtype=ADDRESS_DTYPE, count=size // ADDRESS_DTYPE.itemsize)
+            self._addresses = [address.decode("ascii") for address in stored]
+            self._ids = {address: index for index, address in enumerate(self._addresses)}
+
+    def _token_id(self, address, new_addresses):
+        token_id = self._ids.get(address)
+        if token_id is None:
+            token_id = self._ids[address] = len(self._addresses)
+            self._addresses.append(address)
+            new_addresses.append(address)
+        return token_id
+
+    def append(self, snapshots, now=None):
+        # snapshots : {adresse: dict de suivi (initial, current, holders, volume, rugscore, top_holders, lq...)}
+        if not snapshots:
+            return 0
+        now = now if now is not None else time.time()
+        records = np.zeros(len(snapshots), dtype=RECORD_DTYPE)
+        with self._lock:
+            new_addresses = []
+            for row, (address, track) in zip(records, snapshots.items()):
+                top_holders = track.get("top_holders") or []
+                row["ts"] = now
+                row["detected_at"] = _number(track.get("timestamp"), now)
+                row["token"] = self._token_id(address, new_addresses)
+                row["holders"] = int(_number(track.get("holders"), -1))
+                row["mc"] = _number(track.get("current"), np.nan)
+                row["initial_mc"] = _number(track.get("initial"), np.nan)
+                row["volume"] = _number(track.get("volume"), np.nan)
+                row["lq"] = _number(track.get("lq"), np.nan)
+                row["top_holder"] = _number(top_holders[0] if top_holders else None, np.nan)
+                row["rugscore"] = int(_number(track.get("rugscore"), -1))
+                row["lp_locked"] = -1 if track.get("lp_locked") is None else int(bool(track["lp_locked"]))
+                row["honeypot"] = -1 if track.get("honeypot") is None else int(bool(track["honeypot"]))
+                row["verdict"] = VERDICTS.get(track.get("verdict"), 0)
+                row["rule"] = RULE_CODES.get(track.get("rule"), 0)
+            # Adresses d'abord : un enregistrement ne référence jamais un identifiant absent du disque
+            if new_addresses:
+                with open(self.addresses_path, "ab") as f:
+                    f.write(np.array(new_addresses, dtype=ADDRESS_DTYPE).tobytes())
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+        return len(records)
+
+    def load(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        count = size // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        # Lecture mappée : seules les colonnes touchées par une requête sont paginées
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def address(self, token_id):
+        return self._addresses[token_id]
+
+    def _grouped(self, records):
+        # Tri par (token, ts) puis bornes de chaque groupe de token
+        order = np.lexsort((records["ts"], records["token"]))
+        ordered = records[order]
+        starts = np.flatnonzero(np.r_[True, ordered["token"][1:] != ordered["token"][:-1]])
+        ends = np.r_[starts[1:], len(ordered)] - 1
+        return ordered, starts, ends
+
+    def mc_multiple(self, records=None):
+        # Multiple de MC depuis la détection, pour tous les tokens : (ids, multiple courant, multiple max)
+        records = self.load() if records is None else records
+        if len(records) == 0:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0), np.zeros(0)
+        ordered, starts, ends = self._grouped(records)
+        initial = ordered["initial_mc"][starts]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current = ordered["mc"][ends] / initial
+            peak = np.fmax.reduceat(ordered["mc"], starts) / initial
+        return ordered["token"][starts], current, peak
+
+    def holder_growth_rate(self, window=3600, now=None, records=None):
+        # Holders gagnés par heure sur la fenêtre, pour tous les tokens ayant au moins deux points connus
+        records = self.load() if records is None else records
+        now = now if now is not None else time.time()
+        recent = records[(records["ts"] >= now - window) & (records["holders"] >= 0)]
+        if len(recent) == 0:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0)
+        ordered, starts, ends = self._grouped(recent)
+        hours = (ordered["ts"][ends] - ordered["ts"][starts]) / 3600
+        gained = ordered["holders"][ends].astype(np.float64) - ordered["holders"][starts]
+        valid = hours > 0
+        return ordered["token"][starts][valid], gained[valid] / hours[valid]
+
+    def detection_snapshots(self, records=None):
+        # Premier enregistrement de chaque token, et nombre de points suivants (0 : aucune issue connue)
+        records = self.load() if records is None else records
+        if len(records) == 0:
+            return records, np.zeros(0, dtype=np.int64)
+        ordered, starts, ends = self._grouped(records)
+        return ordered[starts], ends - starts
+
+
+def filter_mask(snapshots, min_mc=rules.MIN_MARKET_CAP, min_lq=rules.MIN_LIQUIDITY, min_holders=rules.MIN_HOLDERS,
+                max_top_holder=rules.MAX_TOP_HOLDER_PCT, min_rugscore=rules.MIN_RUGSCORE,
+                rugscore_exception=rules.RUGSCORE_HOLDERS_EXCEPTION):
+    # Réplique vectorisée de FILTER_RULES ; une donnée inconnue ne rejette pas (comme les règles en direct)
+    holders = snapshots["holders"]
+    rugscore = snapshots["rugscore"]
+    keep = snapshots["initial_mc"] >= min_mc
+    keep &= ~(snapshots["lq"] < min_lq)
+    keep &= ~(snapshots["top_holder"] >= max_top_holder)
+    keep &= ~((holders >= 0) & (holders < min_holders))
+    keep &= snapshots["lp_locked"] != 0
+    keep &= snapshots["honeypot"] != 1
+    keep &= ~((rugscore >= 0) & (rugscore < min_rugscore) & ~(holders >= rugscore_exception))
+    return keep
+
+
+def backtest(history, **thresholds):
+    # Issue (multiple de MC) mesurée seulement pour les tokens revus après leur détection
+    snapshots, followups = history.detection_snapshots()
+    _, current, peak = history.mc_multiple()
+    keep = filter_mask(snapshots, **thresholds)
+    alerted = snapshots["verdict"] == VERDICT_ALERTED
+    known = followups > 0
+    report = {}
+    for label, selected in (("kept", keep), ("dropped", ~keep)):
+        measured = selected & known
+        n = int(measured.sum())
+        report[label] = {
+            "tokens": int(selected.sum()),
+            "alerted_live": int((selected & alerted).sum()),
+            "with_outcome": n,
+            "median_multiple": float(np.nanmedian(current[measured])) if n else None,
+            "median_peak": float(np.nanmedian(peak[measured])) if n else None,
+            "x2_rate": float(np.mean(peak[measured] >= 2)) if n else None,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="Historique des métriques des tokens suivis")
+    parser.add_argument("--file", default=HISTORY_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    bt = sub.add_parser("backtest", help="Rejoue les règles de filtrage sur l'historique")
+    bt.add_argument("--min-mc", type=float, default=rules.MIN_MARKET_CAP)
+    bt.add_argument("--min-lq", type=float, default=rules.MIN_LIQUIDITY)
+    bt.add_argument("--min-holders", type=int, default=rules.MIN_HOLDERS)
+    bt.add_argument("--max-top-holder", type=float, default=rules.MAX_TOP_HOLDER_PCT)
+    bt.add_argument("--min-rugscore", type=int, default=rules.MIN_RUGSCORE)
+    momentum = sub.add_parser("momentum", help="Meilleurs multiples et croissance des holders")
+    momentum.add_argument("--window", type=int, default=3600)
+    momentum.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    history = TokenHistory(args.file)
+    if args.command == "backtest":
+        report = backtest(history, min_mc=args.min_mc, min_lq=args.min_lq, min_holders=args.min_holders,
+                          max_top_holder=args.max_top_holder, min_rugscore=args.min_rugscore)
+        for label, stats in report.items():
+            print(f"{label:8} {stats}")
+    else:
+        token_ids, current, _ = history.mc_multiple()
+        for index in np.argsort(-np.nan_to_num(current, nan=-np.inf))[:args.top]:
+            print(f"x{current[index]:.2f}  {history.address(token_ids[index])}")
+        token_ids, rates = history.holder_growth_rate(args.window)
+        for index in np.argsort(-rates)[:args.top]:
+            print(f"+{rates[index]:.1f} holders/h  {history.address(token_ids[index])}")
@@ -1,30 +1,146 @@
-import json
-import os
+import time
+import logging
+from bisect import bisect_left, insort
+from threading import Lock, Thread
 
-STATS_FILE = "wallet_stats.json"
+from storage import get_store
+
+STATS_NAMESPACE = "wallet_stats"
+FLUSH_INTERVAL = 30
+MIN_TRADES = 5
+
+class WalletRecord:
+    __slots__ = ("wins", "total")
+
+    def __init__(self, wins=0, total=0):
+        self.wins = wins
+        self.total = total
+
+    def winrate(self):
+        if self.total == 0:
+            return None
+        return round(100 * self.wins / self.total, 1)
+
+class WalletStatsStore:
+    def __init__(self, store=None, min_trades=MIN_TRADES, flush_interval=FLUSH_INTERVAL):
+        self.store = store or get_store()
+        self.min_trades = min_trades
+        self.flush_interval = flush_interval
+        self._lock = Lock()
+        self._dirty = set()
+        self._records = {}
+        # Index trié (winrate décroissant, trades décroissants) des wallets avec assez de trades
+        self._index = []
+        self._load(self.store.items(STATS_NAMESPACE))
+        self._flusher = None
+
+    def _load(self, items):
+        records = {}
+        index = []
+        for address, data in items:
+            record = WalletRecord(data.get("wins", 0), data.get("total", 0))
+            records[address] = record
+            if record.total >= self.min_trades:
+                index.append(self._index_key(address, record))
+        index.sort()
+        self._records, self._index, self._dirty = records, index, set()
+
+    def replace(self, data):
+        # Remplacement complet (ancien save_wallet_stats) : les wallets absents de data sont supprimés
+        with self._lock:
+            removed = [address for address in self._records if address not in data]
+            self._load(data.items())
+            with self.store.transaction() as tx:
+                self.store.upsert_many(STATS_NAMESPACE, data, conn=tx)
+                self.store.delete_many(STATS_NAMESPACE, removed, conn=tx)
+
+    @staticmethod
+    def _index_key(address, record):
+        return (-record.wins / record.total, -record.total, address)
+
+    def _apply(self, address, is_win):
+        record = self._records.get(address)
+        if record is None:
+            record = self._records[address] = WalletRecord()
+        if record.total >= self.min_trades:
+            key = self._index_key(address, record)
+            del self._index[bisect_left(self._index, key)]
+        record.total += 1
+        if is_win:
+            record.wins += 1
+        if record.total >= self.min_trades:
+            insort(self._index, self._index_key(address, record))
+        self._dirty.add(address)
+
+    def update(self, address, is_win):
+        with self._lock:
+            self._apply(address, is_win)
+
+    def bulk_update(self, results):
+        with self._lock:
+            for address, is_win in results:
+                self._apply(address, is_win)
+
+    def winrate(self, address):
+        record = self._records.get(address)
+        return record.winrate() if record else None
+
+    def bulk_winrate(self, addresses):
+        records = self._records
+        return {address: (records[address].winrate() if address in records else None) for address in addresses}
+
+    def stats(self, address):
+        record = self._records.get(address)
+        return {"wins": record.wins, "total": record.total} if record else None
+
+    def snapshot(self):
+        with self._lock:
+            return {address: {"wins": record.wins, "total": record.total} for address, record in self._records.items()}
+
+    def top(self, n=10):
+        with self._lock:
+            head = self._index[:n]
+        return [(address, round(-ratio * 100, 1), -total) for ratio, total, address in head]
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            batch = {address: {"wins": self._records[address].wins, "total": self._records[address].total} for address in dirty}
+        self.store.upsert_many(STATS_NAMESPACE, batch)
+        return len(batch)
+
+    def start_flusher(self):
+        if self._flusher is None:
+            self._flusher = Thread(target=self._flush_loop, name="wallet-stats-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error("❌ Wallet stats flush error: %s", e)
+
+_wallet_stats = None
+_wallet_stats_lock = Lock()
+
+def get_wallet_stats_store():
+    global _wallet_stats
+    with _wallet_stats_lock:
+        if _wallet_stats is None:
+            _wallet_stats = WalletStatsStore()
+            _wallet_stats.start_flusher()
+        return _wallet_stats
 
 def load_wallet_stats():
-    if not os.path.exists(STATS_FILE):
-        return {}
-    with open(STATS_FILE, "r") as f:
-        return json.load(f)
+    return get_wallet_stats_store().snapshot()
 
 def save_wallet_stats(data):
-    with open(STATS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    get_wallet_stats_store().replace(data)
 
 def update_wallet_stats(wallet_address, is_win):
-    stats = load_wallet_stats()
-    if wallet_address not in stats:
-        stats[wallet_address] = {"wins": 0, "total": 0}
-    stats[wallet_address]["total"] += 1
-    if is_win:
-        stats[wallet_address]["wins"] += 1
-    save_wallet_stats(stats)
+    get_wallet_stats_store().update(wallet_address, is_win)
 
 def get_wallet_winrate(wallet_address):
-    stats = load_wallet_stats()
-    data = stats.get(wallet_address)
-    if not data or data["total"] == 0:
-        return None
-    return round(100 * data["wins"] / data["total"], 1)
+    return get_wallet_stats_store().winrate(wallet_address)
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+
+BATCH_SIZE = 50
+# Un élément qui échoue bloque l'offset et est retenté avec backoff, puis part en dead-letter
+MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+RETRY_BASE = 2
+RETRY_MAX = 300
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT,
+    created_at REAL NOT NULL,
+    UNIQUE (topic, key)
+);
+CREATE TABLE IF NOT EXISTS work_queue_offsets (
+    topic TEXT NOT NULL,
+    consumer TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (topic, consumer)
+);
+CREATE TABLE IF NOT EXISTS work_queue_dead (
+    topic TEXT NOT NULL,
+    consumer TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    error TEXT,
+    failed_at REAL NOT NULL,
+    PRIMARY KEY (topic, consumer, seq)
+);
+"""
+
+
+class WorkQueue:
+    def __init__(self, store, topic):
+        # File append-only dédupliquée : une clé n'est ajoutée qu'une fois par topic
+        self.store = store
+        self.topic = topic
+        self._lock = Lock()
+        self._appended = Event()
+        store.ensure_schema(QUEUE_SCHEMA)
+        self._keys = {row[0] for row in store.query("SELECT key FROM work_queue WHERE topic = ?", (topic,))}
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def append(self, key, payload=None):
+        return self.append_many({key: payload}) == 1
+
+    def append_many(self, items):
+        with self._lock:
+            new = {key: payload for key, payload in items.items() if key not in self._keys}
+            if not new:
+                return 0
+            now = time.time()
+            with self.store.transaction() as tx:
+                tx.executemany(
+                    "INSERT OR IGNORE INTO work_queue (topic, key, payload, created_at) VALUES (?, ?, ?, ?)",
+                    [(self.topic, key, json.dumps(payload), now) for key, payload in new.items()],
+                )
+            self._keys.update(new)
+        self._appended.set()
+        return len(new)
+
+    def offset(self, consumer):
+        rows = self.store.query(
+            "SELECT position FROM work_queue_offsets WHERE topic = ? AND consumer = ?", (self.topic, consumer)
+        )
+        return rows[0][0] if rows else 0
+
+    def read(self, consumer, limit=BATCH_SIZE):
+        rows = self.store.query(
+            "SELECT seq, key, payload FROM work_queue WHERE topic = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (self.topic, self.offset(consumer), limit),
+        )
+        return [(seq, key, json.loads(payload) if payload else None) for seq, key, payload in rows]
+
+    def commit(self, consumer, seq, conn=None):
+        sql = ("INSERT INTO work_queue_offsets (topic, consumer, position) VALUES (?, ?, ?) "
+               "ON CONFLICT(topic, consumer) DO UPDATE SET position = MAX(position, excluded.position)")
+        if conn is not None:
+            conn.execute(sql, (self.topic, consumer, seq))
+            return
+        with self.store.transaction() as tx:
+            tx.execute(sql, (self.topic, consumer, seq))
+
+    def dead_letter(self, consumer, entries, error):
+        # Les éléments abandonnés sont conservés à part et l'offset passe au-delà
+        now = time.time()
+        with self.store.transaction() as tx:
+            tx.executemany(
+                "INSERT OR REPLACE INTO work_queue_dead (topic, consumer, seq, key, error, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.topic, consumer, seq, key, str(error), now) for seq, key, _ in entries],
+            )
+            self.commit(consumer, entries[-1][0], conn=tx)
+
+    def dead_letters(self, consumer):
+        return self.store.query(
+            "SELECT seq, key, error, failed_at FROM work_queue_dead WHERE topic = ? AND consumer = ? ORDER BY seq",
+            (self.topic, consumer),
+        )
+
+    def lag(self, consumer):
+        return self.store.query(
+            "SELECT COUNT(*) FROM work_queue WHERE topic = ? AND seq > ?", (self.topic, self.offset(consumer))
+        )[0][0]
+
+    def wait(self, timeout):
+        self._appended.wait(timeout)
+        self._appended.clear()
+
+    def migrate_json(self, path):
+        marker = f"migrated:queue:{self.topic}"
+        if self.store.get_meta(marker) or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            keys = json.loads(content) if content else []
+        except Exception as e:
+            logging.error("❌ Migration impossible pour %s: %s", path, e)
+            return 0
+        if not isinstance(keys, list):
+            logging.error("❌ Migration ignorée pour %s: format inattendu", path)
+            return 0
+        added = self.append_many({key: None for key in keys})
+        self.store.set_meta(marker, {"source": path, "count": added, "at": time.time()})
+        logging.info("📦 %s entrées migrées de %s vers la file '%s'", added, path, self.topic)
+        return added
+
+
+class QueueConsumer:
+    def __init__(self, queue, name, handler, workers=2, idle=30, batched=False):
+        # handler(clé, payload), ou handler([(clé, payload)]) si batched ;
+        # livraison au moins une fois : l'offset n'avance que sur les éléments traités sans exception
+        self.queue = queue
+        self.name = name
+        self.handler = handler
+        self.batched = batched
+        self.workers = workers
+        self.idle = idle
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"queue-{name}")
+        self._thread = None
+        self._lock = Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None and self.workers > 0:
+                self._thread = Thread(target=self._run, name=f"queue-{self.name}", daemon=True)
+                self._thread.start()
+
+    def lag(self):
+        return self.queue.lag(self.name)
+
+    def _handle(self, key, payload):
+        try:
+            self.handler(key, payload)
+        except Exception as e:
+            return e
+        return None
+
+    def _process(self, batch):
+        # -> (dernier seq traité sans erreur ou None, éléments en échec, erreur)
+        if self.batched:
+            try:
+                self.handler([(key, payload) for _, key, payload in batch])
+            except Exception as e:
+                return None, batch, e
+            return batch[-1][0], [], None
+        errors = list(self._executor.map(lambda item: self._handle(item[1], item[2]), batch))
+        for index, error in enumerate(errors):
+            if error is not None:
+                return (batch[index - 1][0] if index else None), [batch[index]], error
+        return batch[-1][0], [], None
+
+    def _run(self):
+        attempts = {}
+        while True:
+            try:
+                batch = self.queue.read(self.name)
+                if not batch:
+                    self.queue.wait(self.idle)
+                    continue
+                done, failed, error = self._process(batch)
+                if done is not None:
+                    self.queue.commit(self.name, done)
+                if not failed:
+                    attempts.clear()
+                    continue
+                seq = failed[0][0]
+                attempts = {seq: attempts.get(seq, 0) + 1}
+                if attempts[seq] >= MAX_ATTEMPTS:
+                    logging.error("❌ Queue %s/%s: %d élément(s) abandonné(s) après %d essais: %s",
+                                  self.queue.topic, self.name, len(failed), attempts[seq], error)
+                    self.queue.dead_letter(self.name, failed, error)
+                    attempts.clear()
+                    continue
+                delay = min(RETRY_MAX, RETRY_BASE ** attempts[seq])
+                logging.warning("⚠️ Queue %s/%s error (essai %d, reprise dans %ss): %s",
+                                self.queue.topic, self.name, attempts[seq], delay, error)
+                time.sleep(delay)
+            except Exception as e:
+                logging.error("❌ Queue %s/%s error: %s", self.queue.topic, self.name, e)
+                self.queue.wait(self.idle)